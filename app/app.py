@@ -6,9 +6,6 @@ from cash_conversion_cycle import CashConversionCycle
 
 company_id = 1
 
-income_statement = dao.load_income_statement(company_id)
-balance_sheet = dao.load_balance_sheet(company_id)
-
 st.set_page_config(layout="wide", page_title="Cashflow Conversion Cycle")
 
 st.title("Cashflow Conversion Cycle")
@@ -27,11 +24,21 @@ with col1:
     with col1b:
         interest_rate = st.number_input("Interest Rate (%)", value=11)
 
-ccc = CashConversionCycle(
-    income_statement=income_statement,
-    balance_sheet=balance_sheet,
-    sales_growth=sales_growth / 100,
-    interest_rate=interest_rate / 100,
-)
+# A cached load, which returns a new bundle once the database changes
+statements = dao.load_statements(company_id)
+
+# Keep the model between reruns so that changing an assumption only
+# recalculates the cells that depend on it, and rebuild it on new data
+if st.session_state.get("statements") is not statements:
+    st.session_state.statements = statements
+    st.session_state.ccc = CashConversionCycle.from_statements(
+        statements,
+        sales_growth=sales_growth / 100,
+        interest_rate=interest_rate / 100,
+        num_forecast_cols=4,
+    )
+
+ccc = st.session_state.ccc
+ccc.set_assumptions(sales_growth=sales_growth / 100, interest_rate=interest_rate / 100)
 
-st.table(ccc.to_df())
+st.table(ccc.to_styler())
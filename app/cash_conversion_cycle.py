@@ -1,9 +1,13 @@
 from dataclasses import dataclass
 import dao
+import numpy as np
 import pandas as pd
+from numpy.typing import ArrayLike
+from pandas.io.formats.style import Styler
 
-from spreadsheet import FormulaCell, SpreadSheet, Style, ValueCell
-from statements import IncomeStatement, BalanceSheet
+from formula import column_letter
+from spreadsheet import FormulaCell, SpreadSheet, Style, ValueCell, style_frame
+from statements import IncomeStatement, BalanceSheet, StatementBundle
 
 
 class CashConversionCycle:
@@ -29,13 +33,34 @@ class CashConversionCycle:
 
         years = sorted(historical_years) + [max(historical_years) + i for i in range(1, num_forecast_cols + 1)]
 
-        self._spreadsheet = SpreadSheet(0, 1 + num_historical_cols + num_forecast_cols)
+        # Interest expense and the short term debt plug are circular
+        self._spreadsheet = SpreadSheet(
+            0, 2 + num_historical_cols + num_forecast_cols, iterative=True
+        )
+        self._year_cols = [column_letter(i) for i in range(1, 1 + len(years))]
         self._header(years)
         self._key_assumptions(sales_growth, interest_rate)
         self._cash_conversion_cycle()
         self._income_statement(income_statement)
         self._balance_sheet(balance_sheet)
 
+    @classmethod
+    def from_statements(
+        cls,
+        statements: StatementBundle,
+        sales_growth: float,
+        interest_rate: float,
+        num_forecast_cols: int,
+    ) -> "CashConversionCycle":
+        """Builds the model from a company's bundle of statements."""
+        return cls(
+            statements.income_statement,
+            statements.balance_sheet,
+            sales_growth,
+            interest_rate,
+            num_forecast_cols,
+        )
+
     def _header(self, years):
         # Year headers
         row = (
@@ -50,46 +75,45 @@ class CashConversionCycle:
     def _key_assumptions(self, sales_growth: float, interest_rate: float):
         # Sales Growth
         historical = [None] + [
-            FormulaCell(f"( {y}6 - {x}6 ) / {x}6", Style.Percent)
-            for x, y in zip("BC", "CD")
+            FormulaCell("( R6C - R6C[-1] ) / R6C[-1]", Style.Percent) for _ in range(2)
         ]
         forecast = [ValueCell(sales_growth, Style.Percent) for _ in range(4)]
+        self._sales_growth = forecast
         row = ["Sales Growth"] + historical + forecast
         self._spreadsheet.append_row(row)
 
         # Interest Rate
-        row = (
-            ["Interest Rate"]
-            + [None for _ in range(3)]
-            + [ValueCell(interest_rate, Style.Percent) for _ in range(4)]
-        )
+        self._interest_rate = [
+            ValueCell(interest_rate, Style.Percent) for _ in range(4)
+        ]
+        row = ["Interest Rate"] + [None for _ in range(3)] + self._interest_rate
         self._spreadsheet.append_row(row)
 
         # Tax Rate
-        historical = [FormulaCell(f"{x}12 / {x}11", Style.Percent) for x in "BCD"]
-        forecast = [FormulaCell(f"{x}4", Style.Percent) for x in "DEFG"]
+        historical = [FormulaCell("R12C / R11C", Style.Percent) for _ in range(3)]
+        forecast = [FormulaCell("RC[-1]", Style.Percent) for _ in range(4)]
         row = ["Tax Rate"] + historical + forecast
         self._spreadsheet.append_row(row)
 
     def _cash_conversion_cycle(self):
         # Payables Period
-        historical = [FormulaCell(f"( {x}21 + {x}22 ) / ( {x}7 / 365 )") for x in "BCD"]
-        forecast = [FormulaCell(f"{x}5") for x in "DEFG"]
+        historical = [FormulaCell("R20C / ( R7C / 365 )") for _ in range(3)]
+        forecast = [FormulaCell("RC[-1]") for _ in range(4)]
         row = ["Payables Period"] + historical + forecast
         self._spreadsheet.append_row(row)
 
     def _income_statement(self, income_statement: IncomeStatement):
         # Net Sales
         historical = income_statement.net_sales
-        forecast = [FormulaCell(f"{x}6 * ( 1 + {y}2 )") for x, y in zip("DEFG", "EFGH")]
+        forecast = [FormulaCell("RC[-1] * ( 1 + R2C )") for _ in range(4)]
         row = ["Net Sales"] + historical + forecast
         self._spreadsheet.append_row(row)
 
         # Cogs
         historical = income_statement.cost_of_goods_sold
-        forecast = [FormulaCell(f"{x}6 * I7") for x in "EFGH"]
+        forecast = [FormulaCell("R6C * I7") for _ in range(4)]
         percent_of_sales = [
-            FormulaCell("sum([ B7 / B6 , C7 / C6 , D7 / D6 ]) / 3", Style.Percent)
+            FormulaCell("AVERAGE( B7 / B6 , C7 / C6 , D7 / D6 )", Style.Percent)
         ]
         row = ["COGS"] + historical + forecast + percent_of_sales
         self._spreadsheet.append_row(row)
@@ -100,97 +124,92 @@ class CashConversionCycle:
 
         # Operating Expense
         historical = income_statement.operating_expense
-        forecast = [FormulaCell(f"{x}6 * I9") for x in "EFGH"]
+        forecast = [FormulaCell("R6C * I9") for _ in range(4)]
         percent_of_sales = [
-            FormulaCell("sum([ B9 / B6 , C9 / C6 , D9 / D6 ]) / 3", Style.Percent)
+            FormulaCell("AVERAGE( B9 / B6 , C9 / C6 , D9 / D6 )", Style.Percent)
         ]
         row = ["Operating Expense"] + historical + forecast + percent_of_sales
         self._spreadsheet.append_row(row)
 
         # Interest Expense
         historical = income_statement.interest_expense
-        forecast = [FormulaCell(f"{x}3 * {y}19") for x, y in zip("EFGH", "DEFG")]
+        forecast = [FormulaCell("R3C * R19C") for _ in range(4)]
         row = ["Interest Expense"] + historical + forecast
         self._spreadsheet.append_row(row)
 
         # Pretax profits
         row = ["Pretax Profits"] + [
-            FormulaCell(f"{x}6 - {x}7 + {x}8 - {x}9 - {x}10") for x in "BCDEFGH"
+            FormulaCell("R6C - R7C + R8C - R9C - R10C") for _ in range(7)
         ]
         self._spreadsheet.append_row(row)
 
         # Taxes
         historical = income_statement.taxes
-        forecast = [FormulaCell(f"{x}4 * {x}11") for x in "EFGH"]
+        forecast = [FormulaCell("R4C * R11C") for _ in range(4)]
         row = ["Taxes"] + historical + forecast
         self._spreadsheet.append_row(row)
 
         # Net income
-        row = ["Net Income"] + [FormulaCell(f"{x}11 - {x}12") for x in "BCDEFGH"]
+        row = ["Net Income"] + [FormulaCell("R11C - R12C") for _ in range(7)]
         self._spreadsheet.append_row(row)
 
     def _balance_sheet(self, balance_sheet: BalanceSheet):
         # Cash
         historical = balance_sheet.cash
-        forecast = [FormulaCell(f"{x}6 * I14") for x in "EFGH"]
+        forecast = [FormulaCell("R6C * I14") for _ in range(4)]
         percent_of_sales = [
-            FormulaCell("sum([ B14 / B6 , C14 / C6 , D14 / D6 ]) / 3", Style.Percent)
+            FormulaCell("AVERAGE( B14 / B6 , C14 / C6 , D14 / D6 )", Style.Percent)
         ]
         row = ["Cash"] + historical + forecast + percent_of_sales
         self._spreadsheet.append_row(row)
 
         # A/R
         historical = balance_sheet.accounts_recievable
-        forecast = [FormulaCell(f"{x}6 * I15") for x in "EFGH"]
+        forecast = [FormulaCell("R6C * I15") for _ in range(4)]
         percent_of_sales = [
-            FormulaCell("sum([ B15 / B6 , C15 / C6 , D15 / D6 ]) / 3", Style.Percent)
+            FormulaCell("AVERAGE( B15 / B6 , C15 / C6 , D15 / D6 )", Style.Percent)
         ]
         row = ["A/R"] + historical + forecast + percent_of_sales
         self._spreadsheet.append_row(row)
 
         # Inventory
         historical = balance_sheet.inventory
-        forecast = [FormulaCell(f"{x}6 * I16") for x in "EFGH"]
+        forecast = [FormulaCell("R6C * I16") for _ in range(4)]
         percent_of_sales = [
-            FormulaCell("sum([ B16 / B6 , C16 / C6 , D16 / D6 ]) / 3", Style.Percent)
+            FormulaCell("AVERAGE( B16 / B6 , C16 / C6 , D16 / D6 )", Style.Percent)
         ]
         row = ["Inventory"] + historical + forecast + percent_of_sales
         self._spreadsheet.append_row(row)
 
         # PP&E
         historical = balance_sheet.property_plant_and_equipment
-        forecast = [FormulaCell(f"{x}6 * I17") for x in "EFGH"]
+        forecast = [FormulaCell("R6C * I17") for _ in range(4)]
         percent_of_sales = [
-            FormulaCell("sum([ B17 / B6 , C17 / C6 , D17 / D6 ]) / 3", Style.Percent)
+            FormulaCell("AVERAGE( B17 / B6 , C17 / C6 , D17 / D6 )", Style.Percent)
         ]
         row = ["PP&E"] + historical + forecast + percent_of_sales
         self._spreadsheet.append_row(row)
 
         # Total Assets
-        row = ["Total Assets"] + [
-            FormulaCell(f"sum([ {x}14 , {x}15 , {x}16 , {x}17 ])") for x in "BCDEFGH"
-        ]
+        row = ["Total Assets"] + [FormulaCell("SUM( R14C:R17C )") for _ in range(7)]
         self._spreadsheet.append_row(row)
 
         # Notes Payable (PLUG)
         historical = balance_sheet.short_term_debt
-        forecast = [
-            FormulaCell(f"{x}18 - sum([ {x}22 , {x}23 , {x}24 , {x}25 , {x}26 ])")
-            for x in "EFGH"
-        ]
+        forecast = [FormulaCell("R18C - SUM( R20C:R24C )") for _ in range(4)]
         row = ["Short Term Debt (PLUG)"] + historical + forecast
         self._spreadsheet.append_row(row)
 
         # A/P
-        forecast = [FormulaCell(f"{x}5 * {x}7 / 365") for x in "EFGH"]
+        forecast = [FormulaCell("R5C * R7C / 365") for _ in range(4)]
         row = ["A/P"] + balance_sheet.accounts_payable + forecast
         self._spreadsheet.append_row(row)
 
         # Accrued Expenses
         historical = balance_sheet.other_current_liabilities
-        forecast = [FormulaCell(f"{x}6 * I23") for x in "EFGH"]
+        forecast = [FormulaCell("R6C * I21") for _ in range(4)]
         percent_of_sales = [
-            FormulaCell("sum([ B23 / B6 , C23 / C6 , D23 / D6 ]) / 3", Style.Percent)
+            FormulaCell("AVERAGE( B21 / B6 , C21 / C6 , D21 / D6 )", Style.Percent)
         ]
         row = ["Accrued Expenses"] + historical + forecast + percent_of_sales
         self._spreadsheet.append_row(row)
@@ -208,37 +227,82 @@ class CashConversionCycle:
         self._spreadsheet.append_row(row)
 
         # Net Worth
-        forecast = [FormulaCell(f"{x}26 + {y}13") for x, y in zip("DEFG", "EFGH")]
+        forecast = [FormulaCell("R24C[-1] + R13C") for _ in range(4)]
         row = ["Net Worth"] + balance_sheet.share_holders_equity + forecast
         self._spreadsheet.append_row(row)
 
         # Total Liabilities
         row = ["Total Liabilities"] + [
-            FormulaCell(
-                f"sum([ {x}19 , {x}20 , {x}21 , {x}22 , {x}23 , {x}24 , {x}25 , {x}26 ])"
-            )
-            for x in "BCDEFGH"
+            FormulaCell("SUM( R19C:R24C )") for _ in range(7)
         ]
         self._spreadsheet.append_row(row)
 
+    def set_assumptions(self, sales_growth: float, interest_rate: float) -> None:
+        """Updates the forecast assumptions, only recalculating the affected cells.
+
+        Assumptions that did not change are left alone, so a rerun with the
+        same inputs recalculates nothing.
+        """
+        for cell in self._sales_growth:
+            if not np.array_equal(cell.value, sales_growth):
+                cell.value = sales_growth
+
+        for cell in self._interest_rate:
+            if not np.array_equal(cell.value, interest_rate):
+                cell.value = interest_rate
+
+    def evaluate_scenarios(
+        self, sales_growth: ArrayLike, interest_rate: ArrayLike
+    ) -> np.ndarray:
+        """Evaluates the model once for many pairs of assumptions.
+
+        The assumptions are broadcast against each other and flow through the
+        sheet as arrays. Returns an array of shape (scenarios, rows, years).
+        """
+        sales_growth, interest_rate = np.broadcast_arrays(
+            np.ravel(np.asarray(sales_growth, dtype=float)),
+            np.ravel(np.asarray(interest_rate, dtype=float)),
+        )
+        current = self._sales_growth[0].value, self._interest_rate[0].value
+
+        self.set_assumptions(sales_growth, interest_rate)
+        try:
+            return self._spreadsheet.to_numpy(cols=self._year_cols)
+        finally:
+            self.set_assumptions(*current)
+
     def to_string(self, width: int = 5) -> str:
         return self._spreadsheet.to_string(width)
 
     def to_df(self):
         return self._spreadsheet.to_df()
+
+    def to_frame(self) -> pd.DataFrame:
+        """Returns the model values as floats, by line item and year.
+
+        Columns are labelled by year and by whether the year is an actual or
+        a forecast.
+        """
+        frame = self._spreadsheet.to_frame()
+        header = frame.iloc[:2, 1:].fillna("")
+
+        frame = frame.iloc[2:].set_index("A").astype(float)
+        frame.index.name = None
+        frame.columns = pd.MultiIndex.from_arrays(header.to_numpy())
+        return frame
+
+    def to_styler(self) -> Styler:
+        """Returns the model values by line item and year, styled for display."""
+        frame = self.to_frame()
+        styles = self._spreadsheet.styles().iloc[2:, 1:]
+        styles.index, styles.columns = frame.index, frame.columns
+        return style_frame(frame, styles)
     
 if __name__ == "__main__":
     company_id = 1
 
-    income_statement = dao.load_income_statement(company_id)
-    balance_sheet = dao.load_balance_sheet(company_id)
-
-    ccc = CashConversionCycle(
-        income_statement, 
-        balance_sheet, 
-        .25, 
-        .05,
-        num_forecast_cols=4
+    ccc = CashConversionCycle.from_statements(
+        dao.load_statements(company_id), 0.25, 0.05, num_forecast_cols=4
     )
 
     print(ccc.to_df())
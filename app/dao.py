@@ -1,73 +1,337 @@
-from database import Database
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional, TypeVar
+
+import numpy as np
+import pandas as pd
+
+from database import DATABASE_PATH, METRICS, Database, QueryCache, cached
+from database.snapshot import load_snapshot
 from statements import IncomeStatement
 from statements import BalanceSheet
+from statements import StatementBundle
 
-def load_income_statement(company_id: int) -> IncomeStatement:
+Statement = TypeVar("Statement", IncomeStatement, BalanceSheet)
 
-    with Database() as db:
-        results = db.execute(
-        """
-        SELECT 
+# Statements are shared by every session until the database changes
+_cache = QueryCache(DATABASE_PATH)
+
+# Loads statements in parallel, one reader connection per worker
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="dao")
+
+# Statement fields and the columns they are read from
+_INCOME_STATEMENT_COLUMNS = {
+    "net_sales": "net_sales",
+    "cost_of_goods_sold": "cost_of_goods_sold",
+    "operating_expense": "operating_expense",
+    "interest_expense": "interest_expense",
+    "taxes": "taxes",
+}
+
+_BALANCE_SHEET_COLUMNS = {
+    "cash": "cash",
+    "accounts_recievable": "accounts_recievable",
+    "inventory": "inventory",
+    "property_plant_and_equipment": "propery_plant_and_equipment",
+    "accounts_payable": "accounts_payable",
+    "short_term_debt": "short_term_debt",
+    "long_term_debt_current_portion": "long_term_debt_current_portion",
+    "other_current_liabilities": "other_current_liabilities",
+    "long_term_debt": "long_term_debt",
+    "share_holders_equity": "share_holders_equity",
+}
+
+
+def _select(table: str, columns: dict[str, str], where: str) -> str:
+    values = ",\n            ".join(
+        f"COALESCE({column}, 0.0) AS {field}" for field, column in columns.items()
+    )
+    return f"""
+        SELECT
+            company_id,
             year,
-            COALESCE(net_sales, 0),
-            COALESCE(other_pre_profit_income, 0),
-            COALESCE(cost_of_goods_sold, 0),
-            COALESCE(other_pre_profit_expenses, 0),
-            COALESCE(operating_expense, 0),
-            COALESCE(interest_expense, 0),
-            COALESCE(taxes, 0)
-        FROM income_statement
-        WHERE company_id = ?
+            {values}
+        FROM {table}
+        {where}
+        ORDER BY company_id, year
         ;
-        """,
-        (company_id,)
+        """
+
+
+def _from_snapshot(
+    snapshot: dict[str, np.ndarray], columns: dict[str, str], rows: slice | np.ndarray
+) -> dict[str, np.ndarray]:
+    """Reads rows of a table from its snapshot, as views when rows is a slice."""
+    values = {
+        "company_id": snapshot["company_id"][rows],
+        "year": snapshot["year"][rows],
+    }
+    for field, column in columns.items():
+        values[field] = snapshot[column][rows]
+    return values
+
+
+def _load_statement(
+    statement_type: type[Statement],
+    table: str,
+    columns: dict[str, str],
+    company_id: int,
+) -> Statement:
+    snapshot = load_snapshot(table)
+    if snapshot is not None:
+        # Rows are sorted by company, so the company's rows are one slice
+        start, stop = np.searchsorted(
+            snapshot["company_id"], [company_id, company_id + 1]
+        )
+        values = _from_snapshot(snapshot, columns, slice(start, stop))
+        del values["company_id"]
+        return statement_type(
+            **{field: column.tolist() for field, column in values.items()}
         )
 
-        return IncomeStatement(
-            year=[row[0] for row in results],
-            net_sales=[row[1] for row in results],
-            other_pre_profit_income=[row[2] for row in results],
-            cost_of_goods_sold=[row[3] for row in results],
-            other_pre_profit_expenses=[row[4] for row in results],
-            operating_expense=[row[5] for row in results],
-            interest_expense=[row[6] for row in results],
-            taxes=[row[7] for row in results]
+    with Database(read_only=True) as db:
+        results = db.query(
+            _select(table, columns, "WHERE company_id = ?"), (company_id,)
         )
 
-def load_balance_sheet(company_id: int) -> IncomeStatement:
+    # Transpose the rows in one pass, skipping the company id
+    values = list(zip(*results))[1:] or [()] * (len(columns) + 1)
+    fields = ["year", *columns]
+    return statement_type(
+        **{field: list(column) for field, column in zip(fields, values)}
+    )
 
-    with Database() as db:
-        results = db.execute(
-        """
-        SELECT 
-            year,
-            COALESCE(cash, 0),
-            COALESCE(accounts_recievable, 0),
-            COALESCE(inventory, 0),
-            COALESCE(propery_plant_and_equipment, 0),
-            COALESCE(accounts_payable, 0),
-            COALESCE(short_term_debt, 0),
-            COALESCE(long_term_debt_current_portion, 0),
-            COALESCE(other_current_liabilities, 0),
-            COALESCE(long_term_debt, 0),
-            COALESCE(share_holders_equity, 0)
-        FROM balance_sheet
-        WHERE company_id = ?
-        ;
-        """,
-        (company_id,)
+
+def _load_frame(
+    table: str, columns: dict[str, str], company_ids: Optional[Iterable[int]]
+) -> pd.DataFrame:
+    snapshot = load_snapshot(table)
+    if snapshot is not None:
+        if company_ids is None:
+            rows = slice(None)
+        else:
+            rows = np.isin(snapshot["company_id"], list(company_ids))
+
+        values = _from_snapshot(snapshot, columns, rows)
+        return pd.DataFrame(values).set_index(["company_id", "year"])
+
+    if company_ids is None:
+        query, parameters = _select(table, columns, ""), ()
+    else:
+        parameters = tuple(company_ids)
+        placeholders = ", ".join("?" * len(parameters))
+        query = _select(table, columns, f"WHERE company_id IN ({placeholders})")
+
+    with Database(read_only=True) as db:
+        frame = db.read_df(query, parameters)
+
+    return frame.set_index(["company_id", "year"])
+
+
+@cached(_cache)
+def load_income_statement(company_id: int) -> IncomeStatement:
+    return _load_statement(
+        IncomeStatement, "income_statement", _INCOME_STATEMENT_COLUMNS, company_id
+    )
+
+
+@cached(_cache)
+def load_balance_sheet(company_id: int) -> BalanceSheet:
+    return _load_statement(
+        BalanceSheet, "balance_sheet", _BALANCE_SHEET_COLUMNS, company_id
+    )
+
+
+def load_income_statements(
+    company_ids: Optional[Iterable[int]] = None,
+) -> pd.DataFrame:
+    """Loads the income statements of many companies, or all of them, in one query.
+
+    Returns a frame indexed by company id and year, with a column per field.
+    """
+    ids = None if company_ids is None else tuple(company_ids)
+    return _load_income_statements(ids)
+
+
+def load_balance_sheets(company_ids: Optional[Iterable[int]] = None) -> pd.DataFrame:
+    """Loads the balance sheets of many companies, or all of them, in one query.
+
+    Returns a frame indexed by company id and year, with a column per field.
+    """
+    ids = None if company_ids is None else tuple(company_ids)
+    return _load_balance_sheets(ids)
+
+
+@cached(_cache)
+def _load_income_statements(company_ids: Optional[tuple[int, ...]]) -> pd.DataFrame:
+    return _load_frame("income_statement", _INCOME_STATEMENT_COLUMNS, company_ids)
+
+
+@cached(_cache)
+def _load_balance_sheets(company_ids: Optional[tuple[int, ...]]) -> pd.DataFrame:
+    return _load_frame("balance_sheet", _BALANCE_SHEET_COLUMNS, company_ids)
+
+
+@cached(_cache)
+def load_statements(company_id: int) -> StatementBundle:
+    """Loads a company's income statement and balance sheet concurrently.
+
+    The same bundle is returned until the database changes.
+    """
+    income_statement = _executor.submit(load_income_statement, company_id)
+    balance_sheet = _executor.submit(load_balance_sheet, company_id)
+    return StatementBundle(income_statement.result(), balance_sheet.result())
+
+
+def load_statement_bundles(
+    company_ids: Optional[Iterable[int]] = None,
+) -> dict[int, StatementBundle]:
+    """Loads the statements of many companies, or all of them, concurrently.
+
+    Both statement tables are read in parallel with one query each. Companies
+    missing either statement are left out.
+    """
+    ids = None if company_ids is None else tuple(company_ids)
+    income_statements = _executor.submit(load_income_statements, ids)
+    balance_sheets = _executor.submit(load_balance_sheets, ids)
+
+    income_statements = split_statements(income_statements.result(), IncomeStatement)
+    balance_sheets = split_statements(balance_sheets.result(), BalanceSheet)
+
+    return {
+        company_id: StatementBundle(statement, balance_sheets[company_id])
+        for company_id, statement in income_statements.items()
+        if company_id in balance_sheets
+    }
+
+
+def split_statements(
+    frame: pd.DataFrame, statement_type: type[Statement]
+) -> dict[int, Statement]:
+    """Splits a frame of many companies' statements into a statement per company."""
+    statements = {}
+    for company_id, group in frame.groupby(level="company_id", sort=False):
+        statements[company_id] = statement_type(
+            year=group.index.get_level_values("year").tolist(),
+            **{field: group[field].tolist() for field in group.columns},
         )
+    return statements
+
+
+def load_financial_metrics(company_ids: Optional[Iterable[int]] = None) -> pd.DataFrame:
+    """Loads the precomputed metrics of many companies, or all of them.
+
+    Returns a frame indexed by company id and year, with a column per metric.
+    """
+    ids = None if company_ids is None else tuple(company_ids)
+    return _load_financial_metrics(ids)
+
+
+@cached(_cache)
+def _load_financial_metrics(company_ids: Optional[tuple[int, ...]]) -> pd.DataFrame:
+    where, parameters = "", ()
+    if company_ids is not None:
+        parameters = company_ids
+        where = f"WHERE company_id IN ({', '.join('?' * len(company_ids))})"
 
-        return BalanceSheet(
-            year=[row[0] for row in results],
-            cash=[row[1] for row in results],
-            accounts_payable=[row[2] for row in results],
-            inventory=[row[3] for row in results],
-            property_plant_and_equipment=[row[4] for row in results],
-            accounts_recievable=[row[5] for row in results],
-            short_term_debt=[row[6] for row in results],
-            long_term_debt_current_portion=[row[7] for row in results],
-            other_current_liabilities=[row[8] for row in results],
-            long_term_debt=[row[9] for row in results],
-            share_holders_equity=[row[10] for row in results]
+    with Database(read_only=True) as db:
+        frame = db.read_df(
+            f"""
+            SELECT company_id, year, {", ".join(METRICS)}
+            FROM financial_metrics
+            {where}
+            ORDER BY company_id, year
+            ;
+            """,
+            parameters,
         )
+
+    return frame.set_index(["company_id", "year"])
+
+
+@cached(_cache)
+def screen_companies(
+    metric: str,
+    minimum: Optional[float] = None,
+    maximum: Optional[float] = None,
+    year: Optional[int] = None,
+) -> pd.DataFrame:
+    """Finds the company years whose metric lies within the bounds, e.g. DSO > 60.
+
+    Bounds are inclusive and use the metric's index. Returns a frame indexed by
+    company id and year, with the metric as its only column.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric: {metric}")
+
+    conditions, parameters = [], []
+    if minimum is not None:
+        conditions.append(f"{metric} >= ?")
+        parameters.append(minimum)
+    if maximum is not None:
+        conditions.append(f"{metric} <= ?")
+        parameters.append(maximum)
+    if year is not None:
+        conditions.append("year = ?")
+        parameters.append(year)
+
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+    with Database(read_only=True) as db:
+        frame = db.read_df(
+            f"""
+            SELECT company_id, year, {metric}
+            FROM financial_metrics
+            {where}
+            ORDER BY company_id, year
+            ;
+            """,
+            tuple(parameters),
+        )
+
+    return frame.set_index(["company_id", "year"])
+
+
+def load_line_items(
+    items: Iterable[str], company_ids: Optional[Iterable[int]] = None
+) -> pd.DataFrame:
+    """Loads only the requested line items of many companies, or all of them.
+
+    Returns a frame indexed by company id and year, with a column per item
+    in the requested order. Items a company did not report are NaN.
+    """
+    items = tuple(dict.fromkeys(items))
+    ids = None if company_ids is None else tuple(company_ids)
+    return _load_line_items(items, ids)
+
+
+@cached(_cache)
+def _load_line_items(
+    items: tuple[str, ...], company_ids: Optional[tuple[int, ...]]
+) -> pd.DataFrame:
+    where = f"WHERE item IN ({', '.join('?' * len(items))})"
+    parameters = items
+    if company_ids is not None:
+        where += f" AND company_id IN ({', '.join('?' * len(company_ids))})"
+        parameters += company_ids
+
+    with Database(read_only=True) as db:
+        results = db.query(
+            f"""
+            SELECT company_id, year, item, value
+            FROM line_item
+            {where}
+            ORDER BY company_id, year
+            ;
+            """,
+            parameters,
+        )
+
+    # Pivot in one pass, with a row per company year and a column per item
+    columns = {item: i for i, item in enumerate(items)}
+    rows: dict[tuple[int, int], int] = {}
+    values = np.full((len(results), len(items)), np.nan)
+    for company_id, year, item, value in results:
+        row = rows.setdefault((company_id, year), len(rows))
+        values[row, columns[item]] = value
+
+    index = pd.MultiIndex.from_tuples(list(rows), names=["company_id", "year"])
+    return pd.DataFrame(values[: len(rows)], index=index, columns=list(items))
@@ -0,0 +1,244 @@
+import ast
+import re
+from functools import lru_cache, reduce
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+import numpy as np
+
+CELL_REF = re.compile(r"^([A-Z]+)([0-9]+)$")
+
+R1C1_PARTS = re.compile(r"^R(\[-?[0-9]+\]|[0-9]+)?C(\[-?[0-9]+\]|[0-9]+)?$")
+
+# Cell and range references in A1 or R1C1 style, replaced by argument names
+# before parsing. Tokens that are valid A1 locations, e.g. RC6, stay A1.
+_A1 = r"[A-Z]+[0-9]+"
+_R1C1 = r"R(?:\[-?[0-9]+\]|[0-9]+)?C(?:\[-?[0-9]+\]|[0-9]+)?"
+REFERENCE = re.compile(rf"\b(?:{_A1}(?::{_A1})?|{_R1C1}(?::{_R1C1})?)(?![\w\[])")
+
+
+def _values(args: tuple[Any, ...]) -> Iterator[Any]:
+    """Yields the non-empty values of the arguments, iterating over ranges in place."""
+    for arg in args:
+        if isinstance(arg, Iterable) and not isinstance(arg, (str, np.ndarray)):
+            for value in arg:
+                if value is not None:
+                    yield value
+        elif arg is not None:
+            yield arg
+
+
+def SUM(*args: Any) -> float:
+    """Sums numbers and ranges, ignoring empty cells."""
+    return sum(_values(args))
+
+
+def AVERAGE(*args: Any) -> float:
+    """Averages numbers and ranges, ignoring empty cells."""
+    total, count = 0, 0
+    for value in _values(args):
+        total += value
+        count += 1
+
+    if count == 0:
+        raise ZeroDivisionError("AVERAGE of no values")
+    return total / count
+
+
+def MIN(*args: Any) -> float:
+    """Smallest of numbers and ranges, ignoring empty cells."""
+    values = _values(args)
+    first = next(values, None)
+    if first is None:
+        raise ValueError("MIN of no values")
+    return reduce(np.minimum, values, first)
+
+
+def MAX(*args: Any) -> float:
+    """Largest of numbers and ranges, ignoring empty cells."""
+    values = _values(args)
+    first = next(values, None)
+    if first is None:
+        raise ValueError("MAX of no values")
+    return reduce(np.maximum, values, first)
+
+
+FUNCTIONS = {
+    "abs": abs,
+    "max": max,
+    "min": min,
+    "round": round,
+    "sum": sum,
+    "AVERAGE": AVERAGE,
+    "MAX": MAX,
+    "MIN": MIN,
+    "SUM": SUM,
+}
+
+_ALLOWED_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Call,
+    ast.Constant,
+    ast.Name,
+    ast.List,
+    ast.Tuple,
+    ast.Load,
+    ast.operator,
+    ast.unaryop,
+)
+
+
+def column_letter(index: int) -> str:
+    """Converts a zero based column index into its letters, e.g. 0 -> A, 27 -> AB."""
+    letters = ""
+    index += 1
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def column_index(letters: str) -> int:
+    """Converts column letters into a zero based column index, e.g. AB -> 27."""
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+def split_cell_ref(cell_loc: str) -> tuple[str, int]:
+    """Splits a cell location such as AB12 into its column letters and row."""
+    match = CELL_REF.match(cell_loc)
+    if match is None:
+        raise ValueError(f"Invalid cell location: {cell_loc}")
+    return match.group(1), int(match.group(2))
+
+
+@lru_cache(maxsize=4096)
+def range_cells(range_ref: str) -> tuple[str, ...]:
+    """Lists the cell locations in a range such as B14:D17, row by row."""
+    start, end = range_ref.split(":")
+    start_col, start_row = split_cell_ref(start)
+    end_col, end_row = split_cell_ref(end)
+
+    cols = sorted((column_index(start_col), column_index(end_col)))
+    rows = sorted((start_row, end_row))
+
+    return tuple(
+        f"{column_letter(col)}{row}"
+        for row in range(rows[0], rows[1] + 1)
+        for col in range(cols[0], cols[1] + 1)
+    )
+
+
+class CompiledFormula:
+    """A formula parsed once into a function of the cells it references.
+
+    References are written in A1 style (B6, B14:B17) or in relative R1C1
+    style (RC[-1], R6C, R14C:R17C). R1C1 rows and columns are zero based,
+    like the sheet's rows, and a bracketed part is an offset from the cell
+    holding the formula. A formula with relative references is a template
+    that can be shared by every cell of a row or column.
+    """
+
+    __slots__ = ("formula", "references", "relative", "_function")
+
+    def __init__(self, formula: str) -> None:
+        references: dict[str, str] = {}
+
+        def name(match: re.Match) -> str:
+            return references.setdefault(match.group(0), f"_ref{len(references)}")
+
+        try:
+            tree = ast.parse(REFERENCE.sub(name, formula.strip()), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Invalid formula: {formula}") from e
+
+        for node in ast.walk(tree):
+            if not isinstance(node, _ALLOWED_NODES):
+                raise ValueError(f"Unsupported syntax in formula: {formula}")
+
+            if isinstance(node, ast.Call) and not isinstance(node.func, ast.Name):
+                raise ValueError(f"Unsupported function call in formula: {formula}")
+
+            if isinstance(node, ast.Name):
+                if node.id not in FUNCTIONS and node.id not in references.values():
+                    raise ValueError(f"Unknown name '{node.id}' in formula: {formula}")
+
+        self.formula = formula
+        self.references = tuple(references)
+        self.relative = any(
+            not CELL_REF.match(part)
+            for reference in self.references
+            for part in reference.split(":")
+        )
+
+        # Wrap the expression in a lambda taking each reference as an argument
+        location = {"lineno": 1, "col_offset": 0}
+        args = ast.arguments(
+            posonlyargs=[],
+            args=[ast.arg(arg=arg, **location) for arg in references.values()],
+            kwonlyargs=[],
+            kw_defaults=[],
+            defaults=[],
+        )
+        function = ast.Expression(
+            body=ast.Lambda(args=args, body=tree.body, **location)
+        )
+
+        namespace = {"__builtins__": {}, **FUNCTIONS}
+        self._function = eval(compile(function, "<formula>", "eval"), namespace)
+
+    def resolve(self, cell_loc: Optional[str] = None) -> tuple[str, ...]:
+        """Gets the A1 locations of the references for a formula placed at cell_loc."""
+        if not self.relative:
+            return self.references
+
+        if cell_loc is None:
+            raise ValueError(f"Relative formula needs a cell location: {self.formula}")
+
+        col, row = split_cell_ref(cell_loc)
+        col = column_index(col)
+
+        return tuple(
+            ":".join(
+                part if CELL_REF.match(part) else _resolve_r1c1(part, col, row)
+                for part in reference.split(":")
+            )
+            for reference in self.references
+        )
+
+    def evaluate(
+        self, lookup: Callable[[str], float], dependencies: tuple[str, ...]
+    ) -> float:
+        """Evaluates the formula, reading each resolved dependency through lookup.
+
+        Range dependencies are looked up by their reference, e.g. B14:B17, and
+        should resolve to an iterable of the values in the range.
+        """
+        return self._function(*[lookup(dep) for dep in dependencies])
+
+
+def _resolve_r1c1(reference: str, col: int, row: int) -> str:
+    """Converts an R1C1 reference into an A1 location relative to a cell."""
+    row_part, col_part = R1C1_PARTS.match(reference).groups()
+
+    def offset(part: Optional[str], anchor: int) -> int:
+        if part is None:
+            return anchor
+        if part.startswith("["):
+            return anchor + int(part[1:-1])
+        return int(part)
+
+    ref_col, ref_row = offset(col_part, col), offset(row_part, row)
+    if ref_col < 0 or ref_row < 0:
+        raise ValueError(f"Reference {reference} is outside of the sheet")
+
+    return f"{column_letter(ref_col)}{ref_row}"
+
+
+@lru_cache(maxsize=4096)
+def compile_formula(formula: str) -> CompiledFormula:
+    """Compiles a formula, sharing the result between identical formulas."""
+    return CompiledFormula(formula)
@@ -1,9 +1,19 @@
-import string
-from collections import defaultdict
+from collections import defaultdict, deque
 from enum import Enum
-from typing import Optional
+from typing import Iterator, Optional, Sequence
 
+import numpy as np
 import pandas as pd
+from pandas.io.formats.style import Styler
+
+from formula import (
+    CompiledFormula,
+    column_index,
+    column_letter,
+    compile_formula,
+    range_cells,
+    split_cell_ref,
+)
 
 
 class Style(Enum):
@@ -30,12 +40,60 @@ def format_cell(value: str | int | float, style: Style) -> str:
                 return str(value)
 
 
+# Display formats for numeric values, applied when a styled frame is rendered
+STYLE_FORMATS = {
+    Style.Percent: "{:.2%}",
+    Style.Integer: "{:.0f}",
+    Style.String: "{:.0f}",
+}
+
+
+def style_frame(frame: pd.DataFrame, styles: pd.DataFrame) -> Styler:
+    """Attaches the cell styles to a frame of values as display formats.
+
+    The values keep their dtypes. Numeric columns are formatted per row and
+    style by the Styler when it is rendered, and other columns are shown as is.
+    """
+    styler = frame.style.format(na_rep="")
+    numeric = [pd.api.types.is_numeric_dtype(dtype) for dtype in frame.dtypes]
+
+    for label, row_styles in zip(frame.index, styles.to_numpy()):
+        for style in set(row_styles):
+            cols = [
+                col
+                for col, is_numeric, cell_style in zip(
+                    frame.columns, numeric, row_styles
+                )
+                if is_numeric and cell_style == style
+            ]
+            if cols:
+                styler = styler.format(
+                    STYLE_FORMATS[style], na_rep="", subset=([label], cols)
+                )
+
+    return styler
+
+
 class FormulaCell:
 
+    __slots__ = (
+        "_formula",
+        "_value",
+        "_style",
+        "_compiled",
+        "_dependencies",
+        "_sheet",
+        "_loc",
+    )
+
     def __init__(self, formula: str, style: Style = Style.String) -> None:
         self._formula = formula
         self._value = 0.0
         self._style = style
+        self._compiled: Optional[CompiledFormula] = None
+        self._dependencies: Optional[tuple[str, ...]] = None
+        self._sheet: Optional["SpreadSheet"] = None
+        self._loc: Optional[str] = None
 
     @property
     def value(self) -> float:
@@ -55,25 +113,48 @@ class FormulaCell:
     @formula.setter
     def formula(self, formula: float) -> None:
         """Sets the formula."""
+        # Compile and resolve first, so a rejected formula leaves the cell as is
+        compiled = compile_formula(formula)
+        dependencies = compiled.resolve(self._loc) if self._sheet is not None else None
+
         self._formula = formula
+        self._compiled = compiled
+        self._dependencies = dependencies
+
+        if self._sheet is not None:
+            self._sheet._index_cell(self._loc, self)
+
+    @property
+    def compiled(self) -> CompiledFormula:
+        """Gets the compiled formula, compiling it on first use."""
+        if self._compiled is None:
+            self._compiled = compile_formula(self._formula)
+        return self._compiled
+
+    @property
+    def dependencies(self) -> tuple[str, ...]:
+        """Gets the locations the formula reads, resolved for the cell's location."""
+        if self._dependencies is None:
+            self._dependencies = self.compiled.resolve(self._loc)
+        return self._dependencies
 
     def __str__(self) -> str:
         return format_cell(self.value, self._style)
 
     def get_dependencies(self) -> set[str]:
         """Get's the dependencies of the formula cell."""
-        tokens = self._formula.split()
-        deps = set()
-        for token in tokens:
-            if token[0] in string.ascii_uppercase and token[1:].isdigit():
-                deps.add(token)
-        return deps
+        return set(self.dependencies)
 
 
 class ValueCell:
+
+    __slots__ = ("_value", "_style", "_sheet", "_loc")
+
     def __init__(self, value: Optional[float] = None, style: Style = Style.String):
         self._value = value
         self._style = style
+        self._sheet: Optional["SpreadSheet"] = None
+        self._loc: Optional[str] = None
 
     @property
     def value(self) -> float:
@@ -82,150 +163,501 @@ class ValueCell:
 
     @value.setter
     def value(self, value: float) -> None:
-        """Sets the value."""
+        """Sets the value and marks the cells that depend on it for recalculation."""
         self._value = value
 
+        if self._sheet is not None:
+            self._sheet._mark_dirty(self._loc)
+
     def __str__(self) -> str:
         return format_cell(self.value, self._style)
 
 
-class SpreadSheet:
+# Shared stand-in for every position that has never been set
+_EMPTY_CELL = ValueCell()
 
-    def __init__(self, num_rows: int = 0, num_cols: int = 0) -> None:
-        self._row_keys = list(range(0, num_rows))
-        self._col_keys = list(string.ascii_uppercase[0:num_cols])
 
-        self._cells = [
-            {char: ValueCell() for char in self._col_keys} for _ in self._row_keys
-        ]
+class CellRange:
+    """Lazy, reusable view over the values of the cells in a range."""
+
+    __slots__ = ("_cells", "_locs")
+
+    def __init__(self, cells: dict[str, ValueCell | FormulaCell], range_ref: str):
+        self._cells = cells
+        self._locs = range_cells(range_ref)
+
+    def __iter__(self):
+        for cell_loc in self._locs:
+            yield self._cells.get(cell_loc, _EMPTY_CELL).value
+
+
+class SpreadSheet:
+
+    def __init__(
+        self,
+        num_rows: int = 0,
+        num_cols: int = 0,
+        iterative: bool = False,
+        tolerance: float = 1e-6,
+        max_iterations: int = 100,
+    ) -> None:
+        self._row_keys = range(0, num_rows)
+        self._col_keys = [column_letter(i) for i in range(num_cols)]
+
+        # Sparse grid keyed by cell location, empty positions are not stored
+        self._cells: dict[str, ValueCell | FormulaCell] = {}
+
+        # Dependency index, maintained as cells are set. Ranges are nodes of
+        # their own so that a formula has one edge per range it reads.
+        self._graph: dict[str, set[str]] = {}
+        self._dependents: dict[str, set[str]] = defaultdict(set)
+
+        # Cached topological order as each cell's position, rebuilt on the next
+        # evaluation when None. New cells go before the first or after the last.
+        self._position: Optional[dict[str, int]] = {}
+        self._first_position = 0
+        self._last_position = -1
+        self._dirty: set[str] = set()
+
+        # Iterative calculation of circular references. Cells in a cycle map
+        # to the members of their strongly connected component.
+        self._iterative = iterative
+        self._tolerance = tolerance
+        self._max_iterations = max_iterations
+        self._components: dict[str, tuple[str, ...]] = {}
 
     def get_cell(self, cell_loc: str) -> ValueCell | FormulaCell:
         """Gets the cell at the cell location."""
-        col, row = cell_loc[0], int(cell_loc[1:])
-        return self._cells[row][col]
+        self._check_bounds(cell_loc)
+
+        cell = self._cells.get(cell_loc)
+        if cell is None:
+            # Materialize empty positions so that edits to the cell are tracked
+            cell = self._cells[cell_loc] = self._bind(ValueCell(), cell_loc)
+        return cell
 
     def set_cell(self, loc: str, cell: ValueCell | FormulaCell) -> None:
         """Sets the cell at the specified location."""
-        col, row = loc[0], int(loc[1:])
-        self._cells[row][col] = cell
+        self._check_bounds(loc)
 
-    def add_column(self, num: int = 1):
-        for _ in range(num):
-            last_col = self._col_keys[-1]
-            new_col = chr(ord(last_col) + 1)
+        # Binding resolves the formula, so a rejected formula leaves the sheet as is
+        cell = self._bind(cell, loc)
 
-            for row in self._cells:
-                row[new_col] = ValueCell()
+        old_cell = self._cells.get(loc)
+        if old_cell is not None and old_cell is not cell:
+            old_cell._sheet, old_cell._loc = None, None
 
+        self._cells[loc] = cell
+        self._index_cell(loc, cell)
+
+    def add_column(self, num: int = 1):
+        for _ in range(num):
+            new_col = column_letter(len(self._col_keys))
             self._col_keys.append(new_col)
 
+            for row in self._row_keys:
+                self._mark_dirty(f"{new_col}{row}")
+
     def add_row(self, num: int = 1):
         for _ in range(num):
-            self._cells.append({char: ValueCell() for char in self._col_keys})
-            self._row_keys.append(len(self._row_keys))
+            self.append_row([])
 
     def append_row(self, cells: list[float]) -> None:
 
-        num_empty_values = len(self._col_keys) - len(cells)
-
-        for i, cell in enumerate(cells):
-            if not isinstance(cell, ValueCell) and not isinstance(cell, FormulaCell):
-                cells[i] = ValueCell(cell)
-
-        cells = cells + [ValueCell() for _ in range(num_empty_values)]
-
-        self._cells.append({char: cell for char, cell in zip(self._col_keys, cells)})
-
         new_row = len(self._row_keys)
-        self._row_keys.append(new_row)
+        row = {}
+        for i, char in enumerate(self._col_keys):
+            cell = cells[i] if i < len(cells) else None
+            if cell is not None and not isinstance(cell, (ValueCell, FormulaCell)):
+                cell = ValueCell(cell)
+            row[f"{char}{new_row}"] = cell
+
+        # Check every cell before adding the row, so a rejected cell adds nothing
+        placed = [cell for cell in row.values() if cell is not None]
+        if len({id(cell) for cell in placed}) < len(placed):
+            raise ValueError("The same cell object cannot be set at several locations")
+        resolved = {
+            cell_loc: self._resolve(cell, cell_loc)
+            for cell_loc, cell in row.items()
+            if cell is not None
+        }
+
+        self._row_keys = range(0, new_row + 1)
+        for cell_loc, cell in row.items():
+            if cell is None:
+                self._mark_dirty(cell_loc)
+                continue
+
+            self._cells[cell_loc] = self._attach(cell, cell_loc, resolved[cell_loc])
+            self._index_cell(cell_loc, cell)
+
+    def fill_right(self, loc: str, num: int = 1) -> None:
+        """Copies the cell at the location into the next num cells to its right.
+
+        Formulas are copied as written, so relative R1C1 references move with
+        each copy while A1 references keep pointing at the same cells.
+        """
+        self._fill(loc, num, col_step=1, row_step=0)
+
+    def fill_down(self, loc: str, num: int = 1) -> None:
+        """Copies the cell at the location into the next num cells below it."""
+        self._fill(loc, num, col_step=0, row_step=1)
+
+    def _fill(self, loc: str, num: int, col_step: int, row_step: int) -> None:
+        """Copies the cell at the location num times along the given step."""
+        cell = self.get_cell(loc)
+        col, row = split_cell_ref(loc)
+        col = column_index(col)
+
+        for i in range(1, num + 1):
+            if isinstance(cell, FormulaCell):
+                copy = FormulaCell(cell.formula, cell._style)
+                copy._compiled = cell.compiled
+            else:
+                copy = ValueCell(cell.value, cell._style)
+
+            target = f"{column_letter(col + i * col_step)}{row + i * row_step}"
+            self.set_cell(target, copy)
+
+    def _check_bounds(self, cell_loc: str) -> None:
+        """Raises an error if the cell location is outside of the sheet."""
+        col, row = split_cell_ref(cell_loc)
+
+        if row >= len(self._row_keys) or column_index(col) >= len(self._col_keys):
+            raise IndexError(f"Cell location out of range: {cell_loc}")
+
+    def _bind(
+        self, cell: ValueCell | FormulaCell, cell_loc: str
+    ) -> ValueCell | FormulaCell:
+        """Attaches the cell to this sheet so that edits to it update the sheet.
+
+        A formula cell's references are resolved for the location first, and
+        the cell is left unbound if they are invalid.
+        """
+        return self._attach(cell, cell_loc, self._resolve(cell, cell_loc))
+
+    def _resolve(
+        self, cell: ValueCell | FormulaCell, cell_loc: str
+    ) -> Optional[tuple[str, ...]]:
+        """Checks that the cell can be placed at the location, resolving its formula.
+
+        A cell tracks a single location, so a cell already placed elsewhere
+        is rejected rather than shared.
+        """
+        if cell._sheet is not None and (
+            cell._sheet is not self or cell._loc != cell_loc
+        ):
+            msg = f"Cell is already set at {cell._loc}, set a copy of it instead"
+            raise ValueError(msg)
+
+        if isinstance(cell, FormulaCell):
+            return cell.compiled.resolve(cell_loc)
+        return None
+
+    def _attach(
+        self,
+        cell: ValueCell | FormulaCell,
+        cell_loc: str,
+        dependencies: Optional[tuple[str, ...]],
+    ) -> ValueCell | FormulaCell:
+        """Binds a cell checked by _resolve to the location."""
+        if isinstance(cell, FormulaCell):
+            cell._dependencies = dependencies
+
+        cell._sheet, cell._loc = self, cell_loc
+        return cell
+
+    def _index_cell(self, cell_loc: str, cell: ValueCell | FormulaCell) -> None:
+        """Updates the dependency index for a cell that was set or edited."""
+        new_deps = set(cell.dependencies) if isinstance(cell, FormulaCell) else set()
+        old_deps = self._graph.pop(cell_loc, set())
+
+        # Drop edges to dependencies the cell no longer has
+        for dep in old_deps - new_deps:
+            self._remove_edge(dep, cell_loc)
+
+        if isinstance(cell, FormulaCell):
+            self._graph[cell_loc] = deps = old_deps & new_deps
+            self._add_node(cell_loc)
+
+            for dep in new_deps - old_deps:
+                deps.add(dep)
+                self._add_edge(dep, cell_loc)
+
+            self._dirty.add(cell_loc)
+        else:
+            self._dirty.discard(cell_loc)
+
+        self._mark_dirty(cell_loc)
+
+    def _add_node(self, cell_loc: str, first: bool = False) -> None:
+        """Adds the cell to the start or end of the topological order."""
+        if self._position is None or cell_loc in self._position:
+            return
+
+        if first:
+            self._first_position -= 1
+            self._position[cell_loc] = self._first_position
+        else:
+            self._last_position += 1
+            self._position[cell_loc] = self._last_position
+
+    def _add_edge(self, dep: str, cell_loc: str) -> None:
+        """Records that the cell depends on dep, repairing the order if needed."""
+        if ":" in dep and dep not in self._graph:
+            self._add_range(dep)
+
+        self._dependents[dep].add(cell_loc)
+
+        # A cell seen for the first time has no dependencies yet, so it can
+        # go first without disturbing the order
+        self._add_node(dep, first=True)
+
+        if self._position is None:
+            return
+
+        if dep == cell_loc:
+            # Let the full rebuild report the cycle
+            self._position = None
+        elif self._position[dep] > self._position[cell_loc]:
+            if self._components:
+                # The order of a sheet with cycles is rebuilt rather than repaired
+                self._position = None
+            else:
+                self._reorder(dep, cell_loc)
+
+    def _remove_edge(self, dep: str, cell_loc: str) -> None:
+        """Records that the cell no longer depends on dep."""
+        self._dependents[dep].discard(cell_loc)
+
+        if cell_loc in self._components.get(dep, ()):
+            # Removing the edge may break the cycle
+            self._position = None
+
+        if not self._dependents[dep]:
+            del self._dependents[dep]
+
+            if ":" in dep:
+                self._remove_range(dep)
+
+    def _add_range(self, range_ref: str) -> None:
+        """Indexes a range as a node that depends on each of its cells."""
+        self._graph[range_ref] = deps = set()
+        self._add_node(range_ref, first=True)
+
+        for cell_loc in range_cells(range_ref):
+            deps.add(cell_loc)
+            self._add_edge(cell_loc, range_ref)
+
+    def _remove_range(self, range_ref: str) -> None:
+        """Drops a range that no formula reads anymore."""
+        for cell_loc in self._graph.pop(range_ref):
+            self._remove_edge(cell_loc, range_ref)
+
+        self._dirty.discard(range_ref)
+        if self._position is not None:
+            self._position.pop(range_ref, None)
+
+    def _reorder(self, dep: str, cell_loc: str) -> None:
+        """Locally repairs the order after adding an edge from dep to an earlier cell.
+
+        Uses the Pearce-Kelly algorithm: only cells positioned between the two
+        ends of the new edge are searched and shuffled.
+        """
+        lower, upper = self._position[cell_loc], self._position[dep]
+
+        # Cells between the bounds that depend on cell_loc
+        forward = {cell_loc}
+        stack = [cell_loc]
+        while stack:
+            for dependent in self._dependents.get(stack.pop(), ()):
+                if dependent == dep:
+                    # Let the full rebuild report the cycle
+                    self._position = None
+                    return
+
+                if dependent not in forward and self._position[dependent] < upper:
+                    forward.add(dependent)
+                    stack.append(dependent)
+
+        # Cells between the bounds that dep depends on
+        backward = {dep}
+        stack = [dep]
+        while stack:
+            for precedent in self._graph.get(stack.pop(), ()):
+                if precedent not in backward and self._position[precedent] > lower:
+                    backward.add(precedent)
+                    stack.append(precedent)
+
+        # Move the backward set ahead of the forward set within their old slots
+        by_position = self._position.__getitem__
+        moved = sorted(backward, key=by_position) + sorted(forward, key=by_position)
+        slots = sorted(map(by_position, moved))
+
+        for slot, moved_loc in zip(slots, moved):
+            self._position[moved_loc] = slot
+
+    def _mark_dirty(self, cell_loc: str) -> None:
+        """Marks the formula cells that transitively depend on the cell as dirty."""
+        stack = [cell_loc]
+        while stack:
+            for dependent in self._dependents.get(stack.pop(), ()):
+                if dependent not in self._dirty:
+                    self._dirty.add(dependent)
+                    stack.append(dependent)
 
     def _evaluate(self) -> None:
-        """Evaluates each formula cell in topological order."""
-
-        # Get dependency graph
-        graph = self._get_dependencies()
-
-        # Initialize
-        visited = set()
-        temp_visited = set()
-        order: list[str] = []
+        """Evaluates the formula cells that need recalculation in topological order."""
 
-        # Recursive depth first search algorithm
-        def dfs(cell_loc: str) -> None:
-            if cell_loc in temp_visited:
-                raise ValueError("Circular dependency detected")
+        if self._position is None:
+            self._build_order()
 
-            if cell_loc in visited:
-                return
+        solved = set()
+        for cell_loc in sorted(self._dirty, key=self._position.__getitem__):
+            if cell_loc in self._components:
+                if cell_loc not in solved:
+                    self._solve_component(self._components[cell_loc])
+                    solved.update(self._components[cell_loc])
 
-            temp_visited.add(cell_loc)
+            # Ranges only pass changes on to the formulas that read them
+            elif ":" not in cell_loc:
+                self._evaluate_cell(cell_loc)
 
-            for dep in graph[cell_loc]:
-                dfs(dep)
+        self._dirty.clear()
 
-            temp_visited.remove(cell_loc)
-            visited.add(cell_loc)
-            order.append(cell_loc)
+    def _solve_component(self, component: tuple[str, ...]) -> None:
+        """Iterates the cells of a circular reference until their values converge."""
+        cells = [cell_loc for cell_loc in component if ":" not in cell_loc]
 
-        # Run DFS for each cell
-        for col in self._col_keys:
-            for row in self._row_keys:
+        # Start from the previous values, except for scenario arrays whose
+        # shape would otherwise carry over to the new solution
+        for cell_loc in cells:
+            if isinstance(self._cells[cell_loc].value, np.ndarray):
+                self._cells[cell_loc].value = 0.0
 
-                cell_loc = f"{col}{row}"
+        for _ in range(self._max_iterations):
+            change = 0.0
+            for cell_loc in cells:
+                previous = self._cells[cell_loc].value
+                self._evaluate_cell(cell_loc)
+                change = max(
+                    change, np.max(np.abs(self._cells[cell_loc].value - previous))
+                )
 
-                if cell_loc not in visited:
-                    dfs(cell_loc)
+            if change <= self._tolerance:
+                return
 
-        # Evaluate cells in topological order
-        for cell_loc in order:
-            col, row = cell_loc[0], int(cell_loc[1:])
-            cell = self._cells[row][col]
+        msg = (
+            "Circular reference did not converge after "
+            f"{self._max_iterations} iterations"
+        )
+        raise ValueError(msg)
 
-            if isinstance(cell, FormulaCell):
-                self._evaluate_cell(cell_loc)
+    def _build_order(self) -> None:
+        """Rebuilds the topological order of the cells from the dependency index."""
 
-    def _get_dependencies(self) -> dict[str, set[str]]:
-        """Build adjacency list representation of dependencies"""
+        # Count the unresolved dependencies of every cell (Kahn's algorithm)
+        num_deps = {cell_loc: len(deps) for cell_loc, deps in self._graph.items()}
+        for dep in self._dependents:
+            num_deps.setdefault(dep, 0)
 
-        # Initialize
-        graph = defaultdict(set)
+        queue = deque(cell_loc for cell_loc, n in num_deps.items() if n == 0)
+        order: list[str] = []
 
-        # Traverse each cell
-        for col in self._col_keys:
-            for row in self._row_keys:
+        # Release each cell once all of its dependencies are ordered
+        while queue:
+            cell_loc = queue.popleft()
+            order.append(cell_loc)
 
-                cell_loc = f"{col}{row}"
-                cell = self.get_cell(f"{col}{row}")
+            for dependent in self._dependents.get(cell_loc, ()):
+                num_deps[dependent] -= 1
+                if num_deps[dependent] == 0:
+                    queue.append(dependent)
 
-                if isinstance(cell, FormulaCell):
+        self._components = {}
+        if len(order) < len(num_deps):
+            if not self._iterative:
+                raise ValueError("Circular dependency detected")
 
-                    # Add edges from this cell to its dependencies
-                    deps = cell.get_dependencies()
-                    for dep in deps:
-                        graph[cell_loc].add(dep)
-        return graph
+            # Order the strongly connected components instead, each cycle
+            # taking a contiguous block of positions
+            order = []
+            for component in self._strongly_connected_components():
+                order.extend(component)
+
+                if len(component) > 1 or component[0] in self._graph.get(
+                    component[0], ()
+                ):
+                    for cell_loc in component:
+                        self._components[cell_loc] = tuple(component)
+
+        self._position = {cell_loc: i for i, cell_loc in enumerate(order)}
+        self._first_position = 0
+        self._last_position = len(order) - 1
+
+    def _strongly_connected_components(self) -> list[list[str]]:
+        """Finds the strongly connected components with Tarjan's algorithm.
+
+        Runs without recursion and returns the components with dependencies
+        before the cells that depend on them.
+        """
+        index: dict[str, int] = {}
+        low: dict[str, int] = {}
+        stack: list[str] = []
+        on_stack: set[str] = set()
+        components: list[list[str]] = []
+
+        def visit(cell_loc: str) -> None:
+            index[cell_loc] = low[cell_loc] = len(index)
+            stack.append(cell_loc)
+            on_stack.add(cell_loc)
+            work.append((cell_loc, iter(self._graph.get(cell_loc, ()))))
+
+        for root in dict.fromkeys([*self._graph, *self._dependents]):
+            if root in index:
+                continue
+
+            work: list[tuple[str, Iterator[str]]] = []
+            visit(root)
+
+            while work:
+                cell_loc, deps = work[-1]
+
+                for dep in deps:
+                    if dep not in index:
+                        visit(dep)
+                        break
+                    if dep in on_stack:
+                        low[cell_loc] = min(low[cell_loc], index[dep])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[cell_loc])
+
+                    # Pop the finished component off the stack
+                    if low[cell_loc] == index[cell_loc]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == cell_loc:
+                                break
+                        components.append(component)
+
+        return components
 
     def _evaluate_cell(self, cell_loc: str) -> None:
         """Compute the result of a formula cell."""
+        cell = self._cells[cell_loc]
+        cell.value = cell.compiled.evaluate(self._get_value, cell.dependencies)
 
-        # Initialize
-        cell = self.get_cell(cell_loc)
-        eval_formula = cell.formula
-
-        # Replace each dependency with its value
-        for dep_loc in cell.get_dependencies():
-
-            dep_cell = self.get_cell(dep_loc)
-            dep_value = dep_cell.value
-
-            eval_formula = eval_formula.replace(dep_loc, str(dep_value))
-
-        # Evaluate the formula using Python's eval
-        result = eval(eval_formula)
-        cell.value = result
-
-        # Set cell value
-        self.set_cell(cell_loc, cell)
+    def _get_value(self, cell_loc: str) -> float:
+        """Gets the current value of the cell, or a view of the values of a range."""
+        if ":" in cell_loc:
+            return CellRange(self._cells, cell_loc)
+        return self._cells.get(cell_loc, _EMPTY_CELL).value
 
     def to_string(self, width: int = 5) -> str:
         """Evaluates all formula cells and returns a string representation of the spreadsheet."""
@@ -247,8 +679,7 @@ class SpreadSheet:
             # Add cell values for each column
             for col in self._col_keys:
 
-                cell = self.get_cell(f"{col}{row}")
-                value = cell.value
+                value = self._get_value(f"{col}{row}")
 
                 if value is None:
                     value = ""
@@ -266,12 +697,77 @@ class SpreadSheet:
     def to_df(self):
         self._evaluate()
         data = []
-        for row in self._cells:
-            new_row = {key: str(cell) for key, cell in row.items()}
+        for row in self._row_keys:
+            new_row = {
+                col: str(self._cells.get(f"{col}{row}", _EMPTY_CELL))
+                for col in self._col_keys
+            }
             data.append(new_row)
 
         return pd.DataFrame(data).fillna("")
 
+    def to_frame(self) -> pd.DataFrame:
+        """Evaluates all formula cells and returns the unformatted cell values.
+
+        Columns holding only numbers and empty cells come out as floats. The
+        styles of the cells are available separately from styles().
+        """
+        self._evaluate()
+        values = np.full((len(self._row_keys), len(self._col_keys)), None, dtype=object)
+
+        for cell_loc, cell in self._cells.items():
+            col, row = split_cell_ref(cell_loc)
+            values[row, column_index(col)] = cell.value
+
+        return pd.DataFrame(values, columns=self._col_keys).infer_objects()
+
+    def styles(self) -> pd.DataFrame:
+        """Returns the style of each cell, aligned with to_frame()."""
+        styles = np.full(
+            (len(self._row_keys), len(self._col_keys)), Style.String, dtype=object
+        )
+
+        for cell_loc, cell in self._cells.items():
+            col, row = split_cell_ref(cell_loc)
+            styles[row, column_index(col)] = cell._style
+
+        return pd.DataFrame(styles, columns=self._col_keys)
+
+    def to_styler(self) -> Styler:
+        """Evaluates all formula cells and returns the values styled for display."""
+        return style_frame(self.to_frame(), self.styles())
+
+    def to_numpy(
+        self, rows: Optional[Sequence[int]] = None, cols: Optional[Sequence[str]] = None
+    ) -> np.ndarray:
+        """Evaluates all formula cells and returns the numeric cell values.
+
+        Cells may hold NumPy arrays, e.g. one value per scenario, in which case
+        the result has shape (*scenarios, rows, cols). Non-numeric cells are NaN.
+        """
+        self._evaluate()
+        rows = self._row_keys if rows is None else rows
+        cols = self._col_keys if cols is None else cols
+
+        values = [[self._get_value(f"{col}{row}") for col in cols] for row in rows]
+
+        # Broadcast scalar cells against the cells holding arrays
+        shapes = [
+            np.shape(value)
+            for row in values
+            for value in row
+            if isinstance(value, np.ndarray)
+        ]
+        batch_shape = np.broadcast_shapes(*shapes) if shapes else ()
+
+        result = np.full(batch_shape + (len(rows), len(cols)), np.nan)
+        for i, row in enumerate(values):
+            for j, value in enumerate(row):
+                if isinstance(value, (int, float, np.ndarray)):
+                    result[..., i, j] = value
+
+        return result
+
 
 if __name__ == "__main__":
     sheet = SpreadSheet()
@@ -24,3 +24,9 @@ class IncomeStatement:
     operating_expense: list[float]
     interest_expense: list[float]
     taxes: list[float]
+
+
+@dataclass
+class StatementBundle:
+    income_statement: IncomeStatement
+    balance_sheet: BalanceSheet
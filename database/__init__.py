@@ -1,3 +1,19 @@
-from .database import Database
+from .cache import QueryCache, cached
+from .database import DATABASE_PATH, Database
+from .line_items import LINE_ITEM_KEY, store_line_items
+from .metrics import METRICS, refresh_financial_metrics
+from .pool import ConnectionPool, get_pool, read_only_uri
 
-__all__ = ["Database"]
+__all__ = [
+    "DATABASE_PATH",
+    "LINE_ITEM_KEY",
+    "METRICS",
+    "ConnectionPool",
+    "Database",
+    "QueryCache",
+    "cached",
+    "get_pool",
+    "read_only_uri",
+    "refresh_financial_metrics",
+    "store_line_items",
+]
@@ -0,0 +1,76 @@
+import sqlite3 as sql
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Hashable, TypeVar
+
+from .pool import read_only_uri
+
+T = TypeVar("T")
+
+
+class QueryCache:
+    """Bounded LRU cache of query results, cleared when the database changes.
+
+    Changes are detected with PRAGMA data_version on a dedicated connection
+    that never writes, so commits made through any other connection or
+    process invalidate the cache. Cached results are shared between callers
+    and should be treated as read-only.
+    """
+
+    def __init__(self, database_path: str, maxsize: int = 256) -> None:
+        self._database = database_path
+        self._maxsize = maxsize
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection: sql.Connection = None
+        self._version: int = None
+
+    def get(self, key: Hashable, load: Callable[[], T]) -> T:
+        """Gets the cached result for the key, loading it on a miss."""
+        with self._lock:
+            version = self._data_version()
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        value = load()
+
+        with self._lock:
+            # Only keep the result if the database did not change meanwhile
+            if self._version == version:
+                self._entries[key] = value
+                if len(self._entries) > self._maxsize:
+                    self._entries.popitem(last=False)
+
+        return value
+
+    def clear(self) -> None:
+        """Drops every cached result."""
+        with self._lock:
+            self._entries.clear()
+
+    def _data_version(self) -> int:
+        if self._connection is None:
+            self._connection = sql.connect(
+                read_only_uri(self._database), uri=True, check_same_thread=False
+            )
+        return self._connection.execute("PRAGMA data_version").fetchone()[0]
+
+
+def cached(cache: QueryCache) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Caches a loader's results in the cache, keyed by its name and arguments."""
+
+    def decorator(function: Callable[..., T]) -> Callable[..., T]:
+        @wraps(function)
+        def wrapper(*args: Hashable, **kwargs: Hashable) -> T:
+            key = (function.__name__, args, tuple(sorted(kwargs.items())))
+            return cache.get(key, lambda: function(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
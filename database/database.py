@@ -1,33 +1,138 @@
 import sqlite3 as sql
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional, Sequence
+
 import pandas as pd
 
+from .pool import ConnectionPool, get_pool
+
+DATABASE_PATH = "database/company_financials.db"
+
 
 class Database:
-    def __init__(self, database_path="database/company_financials.db") -> None:
+    def __init__(
+        self,
+        database_path=DATABASE_PATH,
+        pool: Optional[ConnectionPool] = None,
+        read_only: bool = False,
+    ) -> None:
         self._database = database_path
+        self._pool = pool if pool is not None else get_pool(database_path, read_only)
         self._connection: sql.Connection = None
         self._cursor: sql.Cursor = None
+        self._in_transaction = False
 
     def __enter__(self) -> "Database":
-        self._connection = sql.connect(self._database)
+        self._connection = self._pool.acquire()
         self._cursor = self._connection.cursor()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
         self._cursor.close()
-        self._connection.close()
+        self._pool.release(self._connection)
+
+    @contextmanager
+    def transaction(self) -> Iterator["Database"]:
+        """Runs the enclosed statements in one transaction, committed once at the end.
+
+        The transaction is rolled back if the block raises. Nested calls join
+        the outer transaction.
+        """
+        if self._in_transaction:
+            yield self
+            return
+
+        # Writers take the write lock up front, so a transaction that reads
+        # before it writes waits for other writers instead of failing midway
+        self._cursor.execute("BEGIN" if self._pool.read_only else "BEGIN IMMEDIATE")
+        self._in_transaction = True
+        try:
+            yield self
+        except BaseException:
+            self._connection.rollback()
+            raise
+        else:
+            self._connection.commit()
+        finally:
+            self._in_transaction = False
 
     def load_df(
         self, df: pd.DataFrame, table: str, replace: bool = False, index: bool = True
     ) -> None:
-        df.to_sql(
-            name=table,
-            con=self._connection,
-            if_exists="replace" if replace else "fail",
-            index=index,
-        )
+        # DataFrame.to_sql commits on its own, so the table is written here to
+        # keep it inside any open transaction
+        if index:
+            df = df.reset_index()
+        if replace:
+            self._cursor.execute(f'DROP TABLE IF EXISTS "{table}";')
+
+        self._cursor.execute(pd.io.sql.get_schema(df, table, con=self._connection))
+        self._cursor.executemany(_insert(table, df.columns), _rows(df))
+        self._commit()
+
+    def read_df(self, query: str, parameters: tuple = ()) -> pd.DataFrame:
+        return pd.read_sql_query(query, self._connection, params=parameters)
+
+    def query(self, query: str, parameters: tuple = ()) -> list[tuple]:
+        """Runs a read-only query without committing."""
+        return self._cursor.execute(query, parameters).fetchall()
 
     def execute(self, query: str, parameters: tuple = ()):
         cursor = self._cursor.execute(query, parameters)
-        self._connection.commit()
+        self._commit()
         return cursor.fetchall()
+
+    def execute_script(self, script: str) -> None:
+        """Runs each statement of a SQL script, inside any open transaction."""
+        # Connection.executescript commits first, so statements run one by one
+        statement = ""
+        for line in script.splitlines(keepends=True):
+            statement += line
+            if sql.complete_statement(statement):
+                self._cursor.execute(statement)
+                statement = ""
+
+        if statement.strip():
+            self._cursor.execute(statement)
+        self._commit()
+
+    def executemany(self, query: str, parameters: Iterable[Sequence]) -> None:
+        self._cursor.executemany(query, parameters)
+        self._commit()
+
+    def upsert(
+        self,
+        df: pd.DataFrame,
+        table: str,
+        key: Sequence[str] = ("company_id", "year"),
+    ) -> None:
+        """Inserts the rows of the frame, updating the rows whose key already exists."""
+        updates = [column for column in df.columns if column not in key]
+        if updates:
+            assignments = ", ".join(
+                f"{column} = excluded.{column}" for column in updates
+            )
+            conflict = f"DO UPDATE SET {assignments}"
+        else:
+            conflict = "DO NOTHING"
+
+        query = (
+            f"{_insert(table, df.columns)} ON CONFLICT ({', '.join(key)}) {conflict}"
+        )
+        self.executemany(query, _rows(df))
+
+    def _commit(self) -> None:
+        if not self._in_transaction:
+            self._connection.commit()
+
+
+def _insert(table: str, columns: Iterable[str]) -> str:
+    columns = list(columns)
+    names = ", ".join(f'"{column}"' for column in columns)
+    placeholders = ", ".join("?" * len(columns))
+    return f'INSERT INTO "{table}" ({names}) VALUES ({placeholders})'
+
+
+def _rows(df: pd.DataFrame) -> Iterator[tuple]:
+    # Missing values are stored as NULL
+    return df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
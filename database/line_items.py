@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from .database import Database
+
+LINE_ITEM_KEY = ("company_id", "item", "year")
+
+# Line items looked up per query, within SQLite's limit on parameters
+_ITEMS_PER_QUERY = 500
+
+
+def store_line_items(db: Database, frame: pd.DataFrame) -> None:
+    """Stores a wide frame of statements as one line item per company, year and column.
+
+    The frame needs company_id and year columns, and every other column is
+    an item. Only values that differ from the stored ones are written, and
+    stored items whose value is missing from the frame are deleted.
+    """
+    items = _melt(frame)
+    merged = items.merge(
+        _stored_items(db, items),
+        how="left",
+        on=list(LINE_ITEM_KEY),
+        suffixes=("", "_stored"),
+    )
+
+    missing = merged["value"].isna()
+    deleted = merged.loc[missing & merged["value_stored"].notna(), list(LINE_ITEM_KEY)]
+    if not deleted.empty:
+        db.executemany(
+            "DELETE FROM line_item WHERE company_id = ? AND item = ? AND year = ?;",
+            deleted.itertuples(index=False, name=None),
+        )
+
+    changed = ~missing & (merged["value"] != merged["value_stored"])
+    if changed.any():
+        db.upsert(
+            merged.loc[changed, [*LINE_ITEM_KEY, "value"]],
+            "line_item",
+            key=LINE_ITEM_KEY,
+        )
+
+
+def _melt(frame: pd.DataFrame) -> pd.DataFrame:
+    # Stacks the item columns in one pass, keeping missing values
+    items = frame.columns.drop(["company_id", "year"])
+    return pd.DataFrame(
+        {
+            "company_id": np.repeat(frame["company_id"].to_numpy(), len(items)),
+            "item": np.tile(items.to_numpy(dtype=object), len(frame)),
+            "year": np.repeat(frame["year"].to_numpy(), len(items)),
+            "value": frame[items].to_numpy(dtype=float).ravel(),
+        }
+    )
+
+
+def _stored_items(db: Database, items: pd.DataFrame) -> pd.DataFrame:
+    # Reads the stored values of the frame's items in its years
+    stored = [pd.DataFrame(columns=[*LINE_ITEM_KEY, "value"])]
+    for company_id, group in items.groupby("company_id", sort=False):
+        years = tuple(group["year"].unique().tolist())
+        names = group["item"].unique().tolist()
+
+        for start in range(0, len(names), _ITEMS_PER_QUERY):
+            batch = tuple(names[start : start + _ITEMS_PER_QUERY])
+            stored.append(
+                db.read_df(
+                    f"""
+                    SELECT company_id, item, year, value
+                    FROM line_item
+                    WHERE company_id = ?
+                        AND item IN ({", ".join("?" * len(batch))})
+                        AND year IN ({", ".join("?" * len(years))})
+                    ;
+                    """,
+                    (int(company_id), *batch, *years),
+                )
+            )
+
+    stored = pd.concat(stored, ignore_index=True)
+    return stored.astype({"company_id": int, "year": int, "value": float})
@@ -0,0 +1,81 @@
+from typing import Iterable, Optional
+
+from .database import Database
+
+METRICS = (
+    "gross_margin",
+    "operating_margin",
+    "tax_rate",
+    "days_sales_outstanding",
+    "days_inventory_outstanding",
+    "days_payables_outstanding",
+    "cash_conversion_cycle",
+)
+
+_REFRESH = """
+    INSERT INTO financial_metrics (
+        company_id,
+        year,
+        gross_margin,
+        operating_margin,
+        tax_rate,
+        days_sales_outstanding,
+        days_inventory_outstanding,
+        days_payables_outstanding,
+        cash_conversion_cycle
+    )
+    SELECT
+        company_id,
+        year,
+        gross_margin,
+        operating_margin,
+        tax_rate,
+        days_sales_outstanding,
+        days_inventory_outstanding,
+        days_payables_outstanding,
+        days_sales_outstanding + days_inventory_outstanding - days_payables_outstanding
+    FROM (
+        SELECT
+            i.company_id,
+            i.year,
+            (i.net_sales - i.cost_of_goods_sold) / i.net_sales AS gross_margin,
+            (i.net_sales - i.cost_of_goods_sold - i.operating_expense)
+                / i.net_sales AS operating_margin,
+            i.taxes / (
+                i.net_sales - i.cost_of_goods_sold - i.operating_expense - i.interest_expense
+            ) AS tax_rate,
+            b.accounts_recievable / (i.net_sales / 365) AS days_sales_outstanding,
+            b.inventory / (i.cost_of_goods_sold / 365) AS days_inventory_outstanding,
+            b.accounts_payable / (i.cost_of_goods_sold / 365) AS days_payables_outstanding
+        FROM income_statement AS i
+        JOIN balance_sheet AS b
+            ON b.company_id = i.company_id AND b.year = i.year
+        {where}
+    )
+    WHERE true
+    ON CONFLICT (company_id, year) DO UPDATE SET
+        gross_margin = excluded.gross_margin,
+        operating_margin = excluded.operating_margin,
+        tax_rate = excluded.tax_rate,
+        days_sales_outstanding = excluded.days_sales_outstanding,
+        days_inventory_outstanding = excluded.days_inventory_outstanding,
+        days_payables_outstanding = excluded.days_payables_outstanding,
+        cash_conversion_cycle = excluded.cash_conversion_cycle
+    ;
+"""
+
+
+def refresh_financial_metrics(
+    db: Database, keys: Optional[Iterable[tuple[int, int]]] = None
+) -> None:
+    """Recomputes the financial metrics of the given (company_id, year) keys.
+
+    Metrics need both statements of a year, so keys without a matching income
+    statement and balance sheet are skipped. Refreshes every row if no keys
+    are given.
+    """
+    if keys is None:
+        db.execute(_REFRESH.format(where=""))
+    else:
+        query = _REFRESH.format(where="WHERE i.company_id = ? AND i.year = ?")
+        db.executemany(query, keys)
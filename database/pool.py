@@ -0,0 +1,152 @@
+import queue
+import sqlite3 as sql
+import threading
+from pathlib import Path
+
+
+class ConnectionPool:
+    """Thread-aware pool of long-lived SQLite connections.
+
+    Each connection is checked out by one thread at a time and returned warm,
+    so its prepared statement cache is reused across calls. A writer pool
+    with a max_size of one queues the writers of this process. Read-only
+    pools open the database in read-only mode, and in WAL journal mode they
+    keep reading while a writer commits.
+
+    Threads wait up to timeout seconds for a connection. A thread that holds
+    every connection of the pool and asks for another would wait on itself,
+    so it gets a RuntimeError instead. Connections wait up to busy_timeout
+    seconds for another process to release its lock on the database.
+    """
+
+    def __init__(
+        self,
+        database_path: str,
+        max_size: int = 8,
+        cached_statements: int = 256,
+        read_only: bool = False,
+        journal_mode: str = "wal",
+        busy_timeout: float = 5.0,
+        timeout: float = 30.0,
+    ) -> None:
+        self._database = database_path
+        self._max_size = max_size
+        self._cached_statements = cached_statements
+        self._read_only = read_only
+        self._journal_mode = journal_mode
+        self._busy_timeout = busy_timeout
+        self._timeout = timeout
+
+        self._idle: queue.LifoQueue[sql.Connection] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._size = 0
+
+        # Thread holding each checked out connection
+        self._owners: dict[sql.Connection, int] = {}
+
+    @property
+    def read_only(self) -> bool:
+        """Whether the pool's connections open the database in read-only mode."""
+        return self._read_only
+
+    def acquire(self) -> sql.Connection:
+        """Checks out an idle connection, opening a new one if the pool has room."""
+        connection = self._checkout()
+        with self._lock:
+            self._owners[connection] = threading.get_ident()
+        return connection
+
+    def release(self, connection: sql.Connection) -> None:
+        """Returns a connection to the pool, discarding any unfinished transaction."""
+        if connection.in_transaction:
+            connection.rollback()
+
+        with self._lock:
+            self._owners.pop(connection, None)
+        self._idle.put(connection)
+
+    def close(self) -> None:
+        """Closes the idle connections."""
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+
+            connection.close()
+            with self._lock:
+                self._size -= 1
+
+    def _checkout(self) -> sql.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._size < self._max_size:
+                self._size += 1
+                return self._connect()
+
+            owners = set(self._owners.values())
+            if self._idle.empty() and owners == {threading.get_ident()}:
+                msg = (
+                    "This thread already holds every connection of the pool, "
+                    "so it would wait for itself"
+                )
+                raise RuntimeError(msg)
+
+        try:
+            return self._idle.get(timeout=self._timeout)
+        except queue.Empty:
+            raise TimeoutError("No database connection available") from None
+
+    def _connect(self) -> sql.Connection:
+        # Connections move between threads but are never used by two at once
+        connection = sql.connect(
+            read_only_uri(self._database) if self._read_only else self._database,
+            uri=self._read_only,
+            timeout=self._busy_timeout,
+            check_same_thread=False,
+            cached_statements=self._cached_statements,
+        )
+
+        # The journal mode is stored in the database file, so only writers set it
+        if not self._read_only:
+            connection.execute(f"PRAGMA journal_mode = {self._journal_mode};")
+        return connection
+
+
+def read_only_uri(database_path: str) -> str:
+    """Gets the URI that opens the database at the path in read-only mode."""
+    return Path(database_path).absolute().as_uri() + "?mode=ro"
+
+
+# Long enough for a writer to wait out an ingestion running in another process
+WRITER_BUSY_TIMEOUT = 600.0
+
+_pools: dict[tuple[str, bool], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(database_path: str, read_only: bool = False) -> ConnectionPool:
+    """Gets the pool shared by every Database for the database path.
+
+    Readers share a pool of read-only connections, while writers share a
+    single connection and wait their turn for it. Writers in this process and
+    in others are waited on for up to WRITER_BUSY_TIMEOUT seconds.
+    """
+    key = (database_path, read_only)
+    with _pools_lock:
+        if key not in _pools:
+            if read_only:
+                pool = ConnectionPool(database_path, max_size=8, read_only=True)
+            else:
+                pool = ConnectionPool(
+                    database_path,
+                    max_size=1,
+                    busy_timeout=WRITER_BUSY_TIMEOUT,
+                    timeout=WRITER_BUSY_TIMEOUT,
+                )
+            _pools[key] = pool
+        return _pools[key]
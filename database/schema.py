@@ -2,10 +2,10 @@ from database import Database
 import os
 from pathlib import Path
 
-with Database() as db:
+with Database() as db, db.transaction():
 
     folder = Path("database/tables")
     for file in os.listdir(folder):
         
         with open(folder / file, 'r') as sql:
-            db.execute(sql.read())
+            db.execute_script(sql.read())
@@ -0,0 +1,104 @@
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .database import DATABASE_PATH, Database
+
+SNAPSHOT_PATH = "database/snapshot"
+SNAPSHOT_TABLES = ("income_statement", "balance_sheet")
+
+# Bumped when the layout of the files changes, so older snapshots are ignored
+SNAPSHOT_FORMAT = 2
+
+
+def export_snapshot(
+    database_path: str = DATABASE_PATH,
+    snapshot_path: str = SNAPSHOT_PATH,
+    tables: tuple[str, ...] = SNAPSHOT_TABLES,
+) -> None:
+    """Exports tables to a columnar snapshot, with one .npy file per column.
+
+    Rows are sorted by company id and year. Missing values are stored as
+    zero, like the statement loaders read them, so the columns can be
+    memory-mapped and used as they are.
+    The snapshot is written next to the old one and swapped in when complete.
+    """
+    # Taken before reading, so a write during the export makes the snapshot stale
+    signature = _signature(database_path)
+
+    snapshot = Path(snapshot_path)
+    staging = snapshot.with_name(snapshot.name + ".tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    columns = {}
+    with Database(database_path, read_only=True) as db:
+        for table in tables:
+            frame = db.read_df(f"SELECT * FROM {table} ORDER BY company_id, year;")
+            for column in frame.columns:
+                values = frame[column].to_numpy()
+                if values.dtype == object:
+                    values = values.astype(float)
+                if values.dtype.kind == "f":
+                    values = np.nan_to_num(values)
+                np.save(staging / f"{table}.{column}.npy", values)
+            columns[table] = list(frame.columns)
+
+    manifest = {"format": SNAPSHOT_FORMAT, "signature": signature, "tables": columns}
+    (staging / "manifest.json").write_text(json.dumps(manifest))
+
+    previous = snapshot.with_name(snapshot.name + ".old")
+    shutil.rmtree(previous, ignore_errors=True)
+    if snapshot.exists():
+        snapshot.rename(previous)
+    staging.rename(snapshot)
+    shutil.rmtree(previous, ignore_errors=True)
+
+
+def load_snapshot(
+    table: str,
+    database_path: str = DATABASE_PATH,
+    snapshot_path: str = SNAPSHOT_PATH,
+) -> Optional[dict[str, np.ndarray]]:
+    """Memory-maps the columns of a table from the snapshot.
+
+    Returns None if there is no snapshot of the table, if it was written in
+    an older format, or if the database changed after it was exported.
+    """
+    snapshot = Path(snapshot_path)
+    try:
+        manifest = json.loads((snapshot / "manifest.json").read_text())
+        if manifest.get("format") != SNAPSHOT_FORMAT:
+            return None
+        if manifest["signature"] != _signature(database_path):
+            return None
+        if table not in manifest["tables"]:
+            return None
+
+        return {
+            column: np.load(snapshot / f"{table}.{column}.npy", mmap_mode="r")
+            for column in manifest["tables"][table]
+        }
+    except FileNotFoundError:
+        # The snapshot was missing, or swapped out while reading it
+        return None
+
+
+def _signature(database_path: str) -> list[Optional[list[int]]]:
+    # Commits touch the database file or, in WAL mode, its write-ahead log
+    signature = []
+    for path in (database_path, database_path + "-wal"):
+        try:
+            stat = os.stat(path)
+            signature.append([stat.st_mtime_ns, stat.st_size])
+        except FileNotFoundError:
+            signature.append(None)
+    return signature
+
+
+if __name__ == "__main__":
+    export_snapshot()
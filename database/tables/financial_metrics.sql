@@ -0,0 +1,30 @@
+CREATE TABLE IF NOT EXISTS financial_metrics (
+    company_id INTEGER,
+    year INTEGER,
+    -- ids
+
+    gross_margin REAL,
+    operating_margin REAL,
+    tax_rate REAL,
+    -- percent of sales
+
+    days_sales_outstanding REAL,
+    days_inventory_outstanding REAL,
+    days_payables_outstanding REAL,
+    cash_conversion_cycle REAL,
+    -- days
+
+    PRIMARY KEY (company_id, year)
+);
+
+CREATE INDEX IF NOT EXISTS financial_metrics_dso
+    ON financial_metrics (days_sales_outstanding);
+
+CREATE INDEX IF NOT EXISTS financial_metrics_dio
+    ON financial_metrics (days_inventory_outstanding);
+
+CREATE INDEX IF NOT EXISTS financial_metrics_dpo
+    ON financial_metrics (days_payables_outstanding);
+
+CREATE INDEX IF NOT EXISTS financial_metrics_ccc
+    ON financial_metrics (cash_conversion_cycle);
@@ -0,0 +1,9 @@
+CREATE TABLE IF NOT EXISTS ingestion_manifest (
+    source TEXT PRIMARY KEY,
+    path TEXT,
+    -- ids
+
+    content_hash TEXT,
+    row_count INTEGER,
+    loaded_at TEXT
+);
@@ -0,0 +1,14 @@
+CREATE TABLE IF NOT EXISTS line_item (
+    company_id INTEGER,
+    year INTEGER,
+    item TEXT,
+    -- ids
+
+    value REAL,
+
+    PRIMARY KEY (company_id, item, year)
+) WITHOUT ROWID;
+
+-- Covers reads of a few items across every company
+CREATE INDEX IF NOT EXISTS line_item_item
+    ON line_item (item, company_id, year, value);
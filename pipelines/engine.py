@@ -0,0 +1,330 @@
+import argparse
+import hashlib
+import json
+import os
+import tomllib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence, Union
+
+import pandas as pd
+
+from database import Database, refresh_financial_metrics, store_line_items
+from pipelines.taxonomy import Taxonomy
+
+SOURCES_PATH = "pipelines/sources"
+
+
+@dataclass
+class Source:
+    """A statement file and how its line items map onto a statement table.
+
+    Line items map onto table columns through the taxonomy. The columns
+    config overrides that for some columns, reading each from one line item
+    or from the sum of several.
+    """
+
+    name: str
+    company_id: int
+    path: str
+    table: str
+    columns: dict[str, Union[str, list[str]]] = field(default_factory=dict)
+
+    def items(self) -> dict[str, list[str]]:
+        """Gets the line items the config sums into each table column."""
+        return {
+            column: [items] if isinstance(items, str) else items
+            for column, items in self.columns.items()
+        }
+
+    def mapped_items(
+        self, taxonomy: Taxonomy, labels: Iterable[str]
+    ) -> dict[str, list[str]]:
+        """Gets the line items summed into each table column, given a file's labels."""
+        items: dict[str, list[str]] = {}
+        for label in labels:
+            column = taxonomy.resolve(self.table, label)
+            if column is not None:
+                items.setdefault(column, []).append(label)
+
+        items.update(self.items())
+        return items
+
+
+def load_source(name: str, folder: str = SOURCES_PATH) -> Source:
+    """Loads the config of a source from its TOML file."""
+    with open(Path(folder) / f"{name}.toml", "rb") as file:
+        return Source(name=name, **tomllib.load(file))
+
+
+def load_sources(folder: str = SOURCES_PATH) -> list[Source]:
+    """Loads the config of every source in the folder."""
+    paths = sorted(Path(folder).glob("*.toml"))
+    return [load_source(path.stem, folder) for path in paths]
+
+
+def source_hash(source: Source, taxonomy: Taxonomy) -> str:
+    """Hashes the contents of a source file together with its config and aliases."""
+    digest = hashlib.sha256(json.dumps(asdict(source), sort_keys=True).encode())
+    digest.update(taxonomy.fingerprint(source.table).encode())
+    with open(source.path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_source(source: Source, taxonomy: Taxonomy) -> pd.DataFrame:
+    """Reads a source file into a frame with a row per year and a column per item."""
+    return _transpose(pd.read_csv(source.path), taxonomy)
+
+
+def stream_source(
+    source: Source, taxonomy: Taxonomy, chunksize: int = 1_000
+) -> Iterator[pd.DataFrame]:
+    """Reads a large source file in chunks of line items, yielding a frame per chunk.
+
+    Each frame has a row per year and a column per line item in the chunk,
+    like read_source, so memory grows with chunksize rather than the file.
+    """
+    for chunk in pd.read_csv(source.path, chunksize=chunksize):
+        yield _transpose(chunk, taxonomy)
+
+
+def line_items(source: Source, df: pd.DataFrame) -> pd.DataFrame:
+    """Gets every line item of a frame read from a source, by company and year.
+
+    Returns a frame with the company id, the year and a column per line
+    item, where line items whose labels normalize to the same name are
+    summed.
+    """
+    items = df.iloc[:, 1:].astype(float)
+    if items.columns.duplicated().any():
+        # Like SQL, a sum is missing if any of its line items is
+        summed = items.T.groupby(level=0, sort=False).sum()
+        missing = items.isna().T.groupby(level=0, sort=False).any()
+        items = summed.mask(missing).T
+
+    items.insert(0, "company_id", source.company_id)
+    items.insert(1, "year", df["year"].astype(int).to_numpy())
+    return items.reset_index(drop=True)
+
+
+def transform_source(
+    source: Source, df: pd.DataFrame, taxonomy: Taxonomy
+) -> pd.DataFrame:
+    """Maps a frame of line items onto the columns of the source's table, in memory.
+
+    Returns a frame with the company id, the year and a column per mapped
+    table column, where a column mapped to several line items is their sum.
+    """
+    items = source.mapped_items(taxonomy, df.columns[1:])
+    missing = {item for column in items.values() for item in column} - set(df.columns)
+    if missing:
+        raise ValueError(f"Missing line items in {source.path}: {sorted(missing)}")
+
+    frame = pd.DataFrame(
+        {
+            "company_id": source.company_id,
+            "year": df["year"].astype(int).to_numpy(),
+        }
+    )
+    for column, column_items in items.items():
+        # Selecting a label gets every column with it, so each is selected once.
+        # Like SQL, a sum is missing if any of its line items is.
+        selected = df[list(dict.fromkeys(column_items))]
+        values = selected.astype(float).sum(axis=1, skipna=False)
+        frame[column] = values.to_numpy()
+    return frame
+
+
+def read_sources(
+    sources: Sequence[Source], taxonomy: Taxonomy, workers: Optional[int] = None
+) -> Iterable[tuple[pd.DataFrame, pd.DataFrame]]:
+    """Reads and transforms sources in a pool of processes, yielding frames in order.
+
+    Yields the line items of each source, as returned by line_items, and its
+    frame mapped onto the table. Uses at most workers processes, one per CPU
+    by default. A single source or worker is read in this process. Labels
+    the workers normalize are added to the taxonomy.
+
+    At most two sources per worker are read ahead of the one being yielded,
+    so parsed frames do not pile up while the writer is slower than the pool.
+    """
+    if len(sources) <= 1 or workers == 1:
+        for source in sources:
+            yield _prepare_source(source, taxonomy)[:2]
+        return
+
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        remaining = iter(sources)
+        pending = deque(
+            executor.submit(_prepare_source, source, taxonomy)
+            for source in islice(remaining, 2 * workers)
+        )
+        while pending:
+            items, frame, labels = pending.popleft().result()
+
+            # Top up the window before the writer takes its turn
+            for source in islice(remaining, 1):
+                pending.append(executor.submit(_prepare_source, source, taxonomy))
+
+            taxonomy.labels.update(labels)
+            yield items, frame
+    finally:
+        # Drops the pending reads if the writer stops early
+        executor.shutdown(cancel_futures=True)
+
+
+def ingest(
+    sources: Iterable[Source],
+    workers: Optional[int] = None,
+    stream: bool = False,
+    batch_size: int = 10_000,
+    force: bool = False,
+    taxonomy: Optional[Taxonomy] = None,
+) -> list[str]:
+    """Loads every source into its statement table, in one transaction.
+
+    Sources are parsed in parallel by read_sources, while this process is the
+    only writer and loads each frame as soon as it is ready. With stream, each
+    source is instead read by stream_source, for files too large to hold in
+    memory. The line items of each chunk are stored as it is read, while only
+    the line items the table maps are kept and loaded in batches of years.
+    A label repeated in a later chunk then replaces its stored line item
+    rather than adding to it.
+
+    Sources whose file and config are unchanged since they were last loaded
+    are skipped unless force is set, and only rows that differ from the
+    table are written. Returns the names of the sources that were loaded.
+
+    Line items are resolved through the taxonomy, loaded from its default
+    files when not given, and the labels it learns are saved afterwards.
+    """
+    sources = list(sources)
+    taxonomy = taxonomy if taxonomy is not None else Taxonomy.load()
+    hashes = {source.name: source_hash(source, taxonomy) for source in sources}
+
+    with Database() as db, db.transaction():
+        if not force:
+            loaded = dict(
+                db.query("SELECT source, content_hash FROM ingestion_manifest;")
+            )
+            sources = [
+                source
+                for source in sources
+                if loaded.get(source.name) != hashes[source.name]
+            ]
+
+        if stream:
+            for source in sources:
+                mapped = []
+                for df in stream_source(source, taxonomy):
+                    store_line_items(db, line_items(source, df))
+                    mapped.append(_mapped_columns(source, df, taxonomy))
+
+                df = pd.concat(mapped, axis=1).reset_index()
+                frame = transform_source(source, df, taxonomy)
+                for start in range(0, len(frame), batch_size):
+                    _ingest_frame(db, source, frame.iloc[start : start + batch_size])
+                _record_source(db, source, hashes[source.name], len(frame))
+        else:
+            frames = read_sources(sources, taxonomy, workers)
+            for source, (items, frame) in zip(sources, frames):
+                store_line_items(db, items)
+                _ingest_frame(db, source, frame)
+                _record_source(db, source, hashes[source.name], len(frame))
+
+    taxonomy.save()
+    return [source.name for source in sources]
+
+
+def _record_source(
+    db: Database, source: Source, content_hash: str, row_count: int
+) -> None:
+    manifest = pd.DataFrame(
+        {
+            "source": [source.name],
+            "path": [source.path],
+            "content_hash": [content_hash],
+            "row_count": [row_count],
+            "loaded_at": [datetime.now(timezone.utc).isoformat()],
+        }
+    )
+    db.upsert(manifest, "ingestion_manifest", key=("source",))
+
+
+def _transpose(df: pd.DataFrame, taxonomy: Taxonomy) -> pd.DataFrame:
+    df["value"] = df["value"].map(taxonomy.normalize)
+    df = df.rename(columns={"value": "year"}).set_index("year")
+    return df.T.reset_index(names="year")
+
+
+def _mapped_columns(
+    source: Source, df: pd.DataFrame, taxonomy: Taxonomy
+) -> pd.DataFrame:
+    # Keep the line items the source maps, indexed by year
+    mapped = {
+        item
+        for items in source.mapped_items(taxonomy, df.columns[1:]).values()
+        for item in items
+    }
+    columns = [label in mapped for label in df.columns[1:]]
+    return df.set_index("year").loc[:, columns]
+
+
+def _prepare_source(
+    source: Source, taxonomy: Taxonomy
+) -> tuple[pd.DataFrame, pd.DataFrame, dict[str, str]]:
+    df = read_source(source, taxonomy)
+    frame = transform_source(source, df, taxonomy)
+    return line_items(source, df), frame, taxonomy.labels
+
+
+def _ingest_frame(db: Database, source: Source, frame: pd.DataFrame) -> None:
+    # Keep only the rows that differ from the table, reading just the stored
+    # rows within the frame's years so each batch reads its own rows
+    columns = list(frame.columns)
+    existing = db.read_df(
+        f"""
+        SELECT {", ".join(columns)}
+        FROM {source.table}
+        WHERE company_id = ? AND year BETWEEN ? AND ?
+        ;
+        """,
+        (source.company_id, int(frame["year"].min()), int(frame["year"].max())),
+    )
+    existing[columns[2:]] = existing[columns[2:]].astype(float)
+    merged = frame.merge(existing, how="left", on=columns, indicator=True)
+    frame = frame[merged["_merge"].to_numpy() == "left_only"]
+    if frame.empty:
+        return
+
+    # Merge
+    db.upsert(frame, source.table)
+
+    # Refresh the metrics of the merged rows
+    keys = frame[["company_id", "year"]].itertuples(index=False, name=None)
+    refresh_financial_metrics(db, keys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Loads statement sources.")
+    parser.add_argument("sources", nargs="*", help="sources to load, all by default")
+    parser.add_argument("--workers", type=int, help="processes parsing sources")
+    parser.add_argument(
+        "--stream", action="store_true", help="read large sources in chunks"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="reload sources that are unchanged"
+    )
+    args = parser.parse_args()
+
+    sources = [load_source(name) for name in args.sources] or load_sources()
+    loaded = ingest(sources, workers=args.workers, stream=args.stream, force=args.force)
+    print(f"Loaded {len(loaded)} of {len(sources)} sources: {', '.join(loaded)}")
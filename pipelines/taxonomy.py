@@ -0,0 +1,98 @@
+import json
+import os
+import re
+import tomllib
+from pathlib import Path
+from typing import Optional
+
+TAXONOMY_PATH = "pipelines/taxonomy.toml"
+LABEL_CACHE_PATH = "database/label_cache.json"
+
+# Version of the rules in normalize_label, bumped whenever they change so
+# that labels cached under older rules are normalized again
+NORMALIZATION_VERSION = 1
+
+_SEPARATORS = re.compile(r"[\s\-]+")
+_PUNCTUATION = re.compile(r"[^a-z0-9_]")
+
+
+def normalize_label(label: str) -> str:
+    """Converts a line item label into a column name.
+
+    E.g. 'Notes payable, bank (PLUG)' becomes notes_payable_bank_plug.
+    """
+    return _PUNCTUATION.sub("", _SEPARATORS.sub("_", label.strip().lower()))
+
+
+class Taxonomy:
+    """Resolves raw line item labels to the fields of the statement tables.
+
+    Labels are normalized once and remembered, so a label seen in an earlier
+    file is a dict lookup. The normalized label is then looked up in an index
+    of every field's aliases. The remembered labels can be saved to a cache
+    file and are reloaded with the taxonomy, unless they were normalized
+    under another NORMALIZATION_VERSION.
+    """
+
+    def __init__(
+        self,
+        aliases: dict[str, dict[str, list[str]]],
+        labels: Optional[dict[str, str]] = None,
+        cache_path: Optional[str] = None,
+    ) -> None:
+        self.aliases = aliases
+        self.labels: dict[str, str] = dict(labels or {})
+        self._cache_path = cache_path
+        self._saved = len(self.labels)
+
+        self._index: dict[tuple[str, str], str] = {}
+        for table, fields in aliases.items():
+            for field, names in fields.items():
+                for name in [field, *names]:
+                    self._index[(table, normalize_label(name))] = field
+
+    @classmethod
+    def load(
+        cls, path: str = TAXONOMY_PATH, cache_path: str = LABEL_CACHE_PATH
+    ) -> "Taxonomy":
+        """Loads the aliases from a TOML file, and the labels cached by earlier runs."""
+        with open(path, "rb") as file:
+            aliases = tomllib.load(file)
+
+        try:
+            cache = json.loads(Path(cache_path).read_text())
+        except FileNotFoundError:
+            cache = {}
+
+        labels = {}
+        if cache.get("version") == NORMALIZATION_VERSION:
+            labels = cache["labels"]
+
+        return cls(aliases, labels, cache_path)
+
+    def save(self) -> None:
+        """Writes the labels to the cache file, if any were added since it was read."""
+        if self._cache_path is None or len(self.labels) == self._saved:
+            return
+
+        staging = self._cache_path + ".tmp"
+        cache = {"version": NORMALIZATION_VERSION, "labels": self.labels}
+        Path(staging).write_text(json.dumps(cache, sort_keys=True))
+        os.replace(staging, self._cache_path)
+        self._saved = len(self.labels)
+
+    def normalize(self, label: str) -> str:
+        """Normalizes a raw label, remembering the result."""
+        normalized = self.labels.get(label)
+        if normalized is None:
+            normalized = self.labels[label] = normalize_label(label)
+        return normalized
+
+    def resolve(self, table: str, item: str) -> Optional[str]:
+        """Gets the table field a normalized line item is an alias of, if any."""
+        return self._index.get((table, item))
+
+    def fingerprint(self, table: str) -> str:
+        """Describes a table's aliases and label rules, to tell when they change."""
+        aliases = self.aliases.get(table, {})
+        return json.dumps([NORMALIZATION_VERSION, aliases], sort_keys=True)
@@ -0,0 +1,55 @@
+import pytest
+
+from pipelines.engine import Source, line_items, read_source, transform_source
+from pipelines.taxonomy import Taxonomy
+
+
+@pytest.fixture
+def taxonomy():
+    return Taxonomy({"balance_sheet": {"cash": [], "accounts_recievable": ["A/R"]}})
+
+
+def read(tmp_path, text: str, taxonomy: Taxonomy, **columns):
+    path = tmp_path / "source.csv"
+    path.write_text(text)
+    source = Source("source", 1, str(path), "balance_sheet", columns)
+    return source, read_source(source, taxonomy)
+
+
+def test_transform_source_maps_line_items(tmp_path, taxonomy):
+    source, df = read(
+        tmp_path, "value,1993,1994\nCash,1,2\nA/R,3,4\nOther,5,6\n", taxonomy
+    )
+    frame = transform_source(source, df, taxonomy)
+
+    assert frame.to_dict("list") == {
+        "company_id": [1, 1],
+        "year": [1993, 1994],
+        "cash": [1.0, 2.0],
+        "accounts_recievable": [3.0, 4.0],
+    }
+
+
+@pytest.mark.parametrize(
+    "text", ["value,1993\nA/R,5\nAR,7\n", "value,1993\nCash,5\ncash,7\n"]
+)
+def test_labels_normalizing_to_one_name_are_summed_once(tmp_path, taxonomy, text):
+    source, df = read(tmp_path, text, taxonomy)
+    frame = transform_source(source, df, taxonomy)
+    items = line_items(source, df)
+
+    column = frame.columns[-1]
+    assert frame[column].tolist() == [12.0]
+    assert items.iloc[:, 2:].to_numpy().tolist() == [[12.0]]
+
+
+def test_configured_columns_sum_line_items(tmp_path, taxonomy):
+    source, df = read(
+        tmp_path,
+        "value,1993\nCash,1\nNote A,2\nNote B,3\n",
+        taxonomy,
+        short_term_debt=["note_a", "note_b"],
+    )
+    frame = transform_source(source, df, taxonomy)
+
+    assert frame["short_term_debt"].tolist() == [5.0]
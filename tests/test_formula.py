@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from formula import AVERAGE, MAX, MIN, SUM
+
+
+def test_functions_skip_empty_cells():
+    assert SUM(1, [2, None, 3]) == 6
+    assert AVERAGE([2, None, 4]) == 3
+    assert MIN(3, [None, 1, 2]) == 1
+    assert MAX([None, 1, 2], 0) == 2
+
+
+def test_min_and_max_broadcast_scenarios():
+    values = [np.array([1.0, 5.0]), 3.0]
+    np.testing.assert_array_equal(MIN(values), [1.0, 3.0])
+    np.testing.assert_array_equal(MAX(values), [3.0, 5.0])
+
+
+@pytest.mark.parametrize("function", [MIN, MAX])
+def test_min_and_max_of_no_values_raise(function):
+    with pytest.raises(ValueError):
+        function([None, None])
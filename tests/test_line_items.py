@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from database import Database, store_line_items
+
+
+@pytest.fixture
+def db(tmp_path):
+    with Database(str(tmp_path / "test.db")) as db:
+        for path in sorted(Path("database/tables").glob("*.sql")):
+            db.execute_script(path.read_text())
+        yield db
+
+
+def stored(db: Database) -> list[tuple]:
+    return db.query(
+        "SELECT company_id, year, item, value FROM line_item ORDER BY year, item;"
+    )
+
+
+def test_store_line_items(db):
+    frame = pd.DataFrame(
+        {"company_id": 1, "year": [1993, 1994], "cash": [43, 52], "ar": [306, np.nan]}
+    )
+    store_line_items(db, frame)
+
+    assert stored(db) == [
+        (1, 1993, "ar", 306.0),
+        (1, 1993, "cash", 43.0),
+        (1, 1994, "cash", 52.0),
+    ]
+
+
+def test_store_line_items_deletes_missing_values(db):
+    frame = pd.DataFrame(
+        {"company_id": 1, "year": [1993, 1994], "cash": [43, 52], "ar": [306, 411]}
+    )
+    store_line_items(db, frame)
+
+    # Only the written company years are touched
+    frame = pd.DataFrame(
+        {"company_id": 1, "year": [1994], "cash": [np.nan], "ar": [500]}
+    )
+    store_line_items(db, frame)
+
+    assert stored(db) == [
+        (1, 1993, "ar", 306.0),
+        (1, 1993, "cash", 43.0),
+        (1, 1994, "ar", 500.0),
+    ]
+
+
+def test_store_line_items_keeps_other_items(db):
+    store_line_items(db, pd.DataFrame({"company_id": 1, "year": [1993], "cash": [43]}))
+    store_line_items(db, pd.DataFrame({"company_id": 1, "year": [1993], "cogs": [9]}))
+
+    assert stored(db) == [(1, 1993, "cash", 43.0), (1, 1993, "cogs", 9.0)]
@@ -0,0 +1,59 @@
+import threading
+
+import pytest
+
+from database import ConnectionPool, Database
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "test.db"), max_size=1, timeout=5.0)
+    yield pool
+    pool.close()
+
+
+def test_nested_writer_on_one_thread_raises(pool):
+    with Database(pool=pool):
+        with pytest.raises(RuntimeError):
+            with Database(pool=pool):
+                pass
+
+    # The connection was returned and can be checked out again
+    with Database(pool=pool) as db:
+        assert db.query("SELECT 1;") == [(1,)]
+
+
+def test_writers_on_other_threads_wait_their_turn(pool):
+    order = []
+
+    def write():
+        with Database(pool=pool):
+            order.append("second")
+
+    with Database(pool=pool):
+        thread = threading.Thread(target=write)
+        thread.start()
+        thread.join(0.2)
+        order.append("first")
+
+    thread.join()
+    assert order == ["first", "second"]
+
+
+def test_waiting_for_a_connection_times_out(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "test.db"), max_size=1, timeout=0.1)
+    errors = []
+
+    def write():
+        try:
+            with Database(pool=pool):
+                pass
+        except TimeoutError as e:
+            errors.append(e)
+
+    with Database(pool=pool):
+        thread = threading.Thread(target=write)
+        thread.start()
+        thread.join()
+
+    assert len(errors) == 1
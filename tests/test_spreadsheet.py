@@ -0,0 +1,199 @@
+import random
+
+import numpy as np
+import pytest
+
+from spreadsheet import FormulaCell, SpreadSheet, ValueCell
+
+NUM_ROWS, NUM_COLS = 4, 4
+
+
+def check_order(sheet: SpreadSheet) -> None:
+    """Asserts that every dependency is ordered before the cells that read it."""
+    if sheet._position is None:
+        return
+
+    for cell_loc, deps in sheet._graph.items():
+        for dep in deps:
+            same_cycle = cell_loc in sheet._components.get(dep, ())
+            assert same_cycle or sheet._position[dep] < sheet._position[cell_loc]
+
+
+def rebuild(cells: dict[str, tuple[str, object]], iterative: bool) -> SpreadSheet:
+    """Builds a fresh sheet holding the cells."""
+    sheet = SpreadSheet(NUM_ROWS, NUM_COLS, iterative=iterative)
+    for loc, (kind, content) in cells.items():
+        cell = FormulaCell(content) if kind == "formula" else ValueCell(content)
+        sheet.set_cell(loc, cell)
+    return sheet
+
+
+def evaluate(sheet: SpreadSheet) -> np.ndarray | type[ValueError]:
+    try:
+        return sheet.to_numpy()
+    except ValueError:
+        return ValueError
+
+
+def random_loc(rng: random.Random) -> str:
+    return f"{'ABCD'[rng.randrange(NUM_COLS)]}{rng.randrange(NUM_ROWS)}"
+
+
+def random_formula(rng: random.Random) -> str:
+    # Every formula is a contraction, so circular references converge
+    terms = [f"0.2 * {random_loc(rng)}" for _ in range(rng.randint(1, 2))]
+    if rng.random() < 0.3:
+        start, end = sorted([random_loc(rng), random_loc(rng)])
+        terms.append(f"0.01 * SUM( {start}:{end} )")
+    return " + ".join(terms) + f" + {rng.randint(1, 9)}"
+
+
+def test_chain_set_in_reverse_is_reordered():
+    sheet = SpreadSheet(1, 4)
+    sheet.set_cell("D0", FormulaCell("C0 + 1"))
+    sheet.set_cell("C0", FormulaCell("B0 * 2"))
+    sheet.set_cell("B0", FormulaCell("A0 - 1"))
+    sheet.set_cell("A0", ValueCell(5.0))
+    check_order(sheet)
+
+    assert sheet.to_numpy().tolist() == [[5.0, 4.0, 8.0, 9.0]]
+
+    sheet.get_cell("A0").value = 1.0
+    assert sheet.to_numpy().tolist() == [[1.0, 0.0, 0.0, 1.0]]
+
+
+def test_rewiring_formula_repairs_order():
+    sheet = SpreadSheet(0, 3)
+    sheet.append_row([1.0, FormulaCell("A0 + 1"), FormulaCell("B0 + 1")])
+    sheet.to_numpy()
+
+    # A0 now reads C0, which was ordered after it
+    sheet.set_cell("A0", FormulaCell("C0 * 0"))
+    sheet.get_cell("C0").formula = "10"
+    check_order(sheet)
+
+    assert sheet.to_numpy().tolist() == [[0.0, 1.0, 10.0]]
+
+
+def test_circular_reference_raises_unless_iterative():
+    sheet = SpreadSheet(0, 2)
+    sheet.append_row([FormulaCell("B0 + 1"), FormulaCell("A0 + 1")])
+
+    with pytest.raises(ValueError, match="Circular"):
+        sheet.to_numpy()
+
+
+def test_circular_reference_is_solved_iteratively():
+    sheet = SpreadSheet(0, 3, iterative=True)
+    sheet.append_row([FormulaCell("0.5 * B0 + 1"), FormulaCell("A0"), 4.0])
+    np.testing.assert_allclose(sheet.to_numpy(), [[2.0, 2.0, 4.0]], atol=1e-5)
+
+    # Only the cycle is solved again when its input changes
+    sheet.get_cell("A0").formula = "0.5 * B0 + C0"
+    np.testing.assert_allclose(sheet.to_numpy(), [[8.0, 8.0, 4.0]], atol=1e-5)
+
+    # Breaking the cycle orders the cells again
+    sheet.get_cell("B0").formula = "C0"
+    np.testing.assert_allclose(sheet.to_numpy(), [[6.0, 4.0, 4.0]])
+    assert not sheet._components
+
+
+def test_circular_reference_that_diverges_raises():
+    sheet = SpreadSheet(0, 2, iterative=True)
+    sheet.append_row([FormulaCell("B0 + 1"), FormulaCell("A0 + 1")])
+
+    with pytest.raises(ValueError, match="converge"):
+        sheet.to_numpy()
+
+
+@pytest.mark.parametrize(
+    "formula",
+    ["A0 +", "R[-1]C", "__import__('os')"],
+    ids=["syntax", "off-sheet", "name"],
+)
+def test_rejected_formula_leaves_sheet_unchanged(formula):
+    sheet = SpreadSheet(0, 2)
+    sheet.append_row([5.0, FormulaCell("A0 * 2")])
+    sheet.append_row([FormulaCell("B0 + 1")])
+    before = sheet.to_numpy()
+
+    with pytest.raises(ValueError):
+        sheet.set_cell("A0", FormulaCell(formula))
+    with pytest.raises(ValueError):
+        sheet.get_cell("B0").formula = formula
+
+    assert sheet.get_cell("A0").value == 5.0
+    assert sheet.get_cell("B0").formula == "A0 * 2"
+    np.testing.assert_array_equal(sheet.to_numpy(), before)
+
+    # The dependency index still propagates edits
+    sheet.get_cell("A0").value = 1.0
+    np.testing.assert_array_equal(sheet.to_numpy(), [[1.0, 2.0], [3.0, np.nan]])
+
+
+@pytest.mark.parametrize("iterative", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_random_edits_match_rebuilt_sheet(seed, iterative):
+    rng = random.Random(seed)
+    sheet = SpreadSheet(NUM_ROWS, NUM_COLS, iterative=iterative)
+    cells = {}
+    for row in range(NUM_ROWS):
+        for col in "ABCD":
+            cells[f"{col}{row}"] = ("value", float(rng.randint(0, 9)))
+            sheet.set_cell(f"{col}{row}", ValueCell(cells[f"{col}{row}"][1]))
+
+    for _ in range(200):
+        loc = random_loc(rng)
+        kind, _ = cells[loc]
+        edit = rng.random()
+
+        if edit < 0.4:
+            cells[loc] = ("formula", random_formula(rng))
+            if kind == "formula" and edit < 0.2:
+                sheet.get_cell(loc).formula = cells[loc][1]
+            else:
+                sheet.set_cell(loc, FormulaCell(cells[loc][1]))
+        elif edit < 0.7 and kind == "value":
+            cells[loc] = ("value", float(rng.randint(0, 9)))
+            sheet.get_cell(loc).value = cells[loc][1]
+        else:
+            cells[loc] = ("value", float(rng.randint(0, 9)))
+            sheet.set_cell(loc, ValueCell(cells[loc][1]))
+
+        if rng.random() < 0.3:
+            expected = evaluate(rebuild(cells, iterative))
+            actual = evaluate(sheet)
+            if expected is ValueError:
+                assert actual is ValueError
+            else:
+                np.testing.assert_allclose(actual, expected, atol=1e-4)
+                check_order(sheet)
+
+
+def test_cell_set_at_two_locations_is_rejected():
+    sheet = SpreadSheet(0, 4)
+    value = ValueCell(1.0)
+
+    with pytest.raises(ValueError):
+        sheet.append_row([value, FormulaCell("A0 + 1"), value])
+    assert len(sheet._row_keys) == 0
+
+    sheet.append_row([value, FormulaCell("A0 + 1")])
+    with pytest.raises(ValueError, match="A0"):
+        sheet.set_cell("C0", value)
+
+    # A replaced cell can be set again
+    sheet.set_cell("A0", ValueCell(2.0))
+    sheet.set_cell("C0", value)
+    value.value = 5.0
+    np.testing.assert_array_equal(sheet.to_numpy(), [[2.0, 3.0, 5.0, np.nan]])
+
+
+def test_repeated_relative_template_is_rejected():
+    sheet = SpreadSheet(0, 4)
+    with pytest.raises(ValueError):
+        sheet.append_row([1.0] + [FormulaCell("RC[-1] + 1")] * 3)
+
+    # A template gets a cell of its own at each location
+    sheet.append_row([1.0] + [FormulaCell("RC[-1] + 1") for _ in range(3)])
+    assert sheet.to_numpy().tolist() == [[1.0, 2.0, 3.0, 4.0]]
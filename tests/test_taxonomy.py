@@ -0,0 +1,42 @@
+import json
+
+from pipelines import taxonomy as taxonomy_module
+from pipelines.taxonomy import Taxonomy, normalize_label
+
+
+def load(tmp_path) -> Taxonomy:
+    path = tmp_path / "taxonomy.toml"
+    path.write_text('[balance_sheet]\naccounts_recievable = ["A/R"]\n')
+    return Taxonomy.load(str(path), str(tmp_path / "label_cache.json"))
+
+
+def test_normalize_label():
+    assert normalize_label("Notes payable, bank (PLUG)") == "notes_payable_bank_plug"
+    assert normalize_label(" A/R ") == "ar"
+
+
+def test_labels_are_cached_between_loads(tmp_path):
+    taxonomy = load(tmp_path)
+    assert taxonomy.resolve("balance_sheet", taxonomy.normalize("A/R")) == (
+        "accounts_recievable"
+    )
+    taxonomy.save()
+
+    assert load(tmp_path).labels == {"A/R": "ar"}
+
+
+def test_cache_of_other_rules_is_discarded(tmp_path, monkeypatch):
+    taxonomy = load(tmp_path)
+    taxonomy.normalize("A/R")
+    taxonomy.save()
+    fingerprint = taxonomy.fingerprint("balance_sheet")
+
+    monkeypatch.setattr(taxonomy_module, "NORMALIZATION_VERSION", 2)
+    taxonomy = load(tmp_path)
+    assert taxonomy.labels == {}
+    assert taxonomy.fingerprint("balance_sheet") != fingerprint
+
+
+def test_cache_without_version_is_discarded(tmp_path):
+    (tmp_path / "label_cache.json").write_text(json.dumps({"A/R": "a_r"}))
+    assert load(tmp_path).labels == {}